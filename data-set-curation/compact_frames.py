@@ -0,0 +1,166 @@
+"""Utilities for representing curation data frames compactly.
+
+The string columns of a curation frame (component SMILES, roles, phases and
+sources) contain only a handful of distinct, heavily repeated values, and so are
+stored as categoricals. Similarly, the components and substances of each data row
+can be interned into integer ids, which are much cheaper to sort, group and
+compare than the SMILES patterns themselves.
+"""
+import re
+from typing import List, NamedTuple, Optional
+
+import numpy
+import pandas
+
+CATEGORICAL_COLUMNS = [r"Phase", r"Source", r"Component \d+", r"Role \d+"]
+FLOAT_COLUMNS = [
+    r"Temperature \(K\)",
+    r"Pressure \(kPa\)",
+    r"Mole Fraction \d+",
+    r"Exact Amount \d+",
+    r".+ Value \(.+\)",
+    r".+ Uncertainty \(.+\)",
+]
+
+
+def is_categorical_column(column_name: str) -> bool:
+    """Returns whether a column of a curation frame is stored as a categorical."""
+    return any(re.fullmatch(pattern, column_name) for pattern in CATEGORICAL_COLUMNS)
+
+
+def compact_frame(data_frame: pandas.DataFrame) -> pandas.DataFrame:
+    """Converts the repeated string columns of a curation frame to categoricals
+    and ensures that its numeric columns are stored as floats rather than as
+    generic objects.
+
+    Parameters
+    ----------
+    data_frame
+        The frame to compact.
+
+    Returns
+    -------
+        The compacted frame, or the frame itself if it is already compact.
+    """
+
+    converted_columns = {}
+
+    for column in data_frame:
+
+        dtype = data_frame[column].dtype
+
+        if is_categorical_column(column) and not isinstance(
+            dtype, pandas.CategoricalDtype
+        ):
+            converted_columns[column] = data_frame[column].astype("category")
+
+        elif (
+            any(re.fullmatch(pattern, column) for pattern in FLOAT_COLUMNS)
+            and dtype == object
+        ):
+            converted_columns[column] = data_frame[column].astype(float)
+
+    if len(converted_columns) == 0:
+        return data_frame
+
+    return data_frame.assign(**converted_columns)
+
+
+def expand_frame(data_frame: pandas.DataFrame) -> pandas.DataFrame:
+    """Converts any categorical columns of a compacted curation frame back to
+    plain object columns, as the built-in curation components expect.
+
+    Parameters
+    ----------
+    data_frame
+        The frame to expand.
+
+    Returns
+    -------
+        The expanded frame, or the frame itself if it contains no categoricals.
+    """
+
+    converted_columns = {
+        column: data_frame[column].astype(object)
+        for column in data_frame
+        if isinstance(data_frame[column].dtype, pandas.CategoricalDtype)
+    }
+
+    if len(converted_columns) == 0:
+        return data_frame
+
+    return data_frame.assign(**converted_columns)
+
+
+def group_ids(*arrays: numpy.ndarray) -> numpy.ndarray:
+    """Returns an integer id for each unique combination of values found across a
+    set of equal length arrays."""
+
+    return (
+        pandas.DataFrame({index: array for index, array in enumerate(arrays)})
+        .groupby([*range(len(arrays))], sort=False, dropna=False)
+        .ngroup()
+        .values
+    )
+
+
+class InternedSubstances(NamedTuple):
+    """The components and substances of each row of a curation frame, interned
+    into integer ids."""
+
+    components: List[str]
+    """The SMILES pattern of each component id, in sorted order."""
+    component_ids: numpy.ndarray
+    """The id of each component of each row with shape=(n_rows, n_columns), in
+    the order of the component columns, and with missing components set to -1."""
+    substances: numpy.ndarray
+    """The sorted component ids of each substance id with
+    shape=(n_substances, n_columns), padded with -1 at the start of each row."""
+    substance_ids: numpy.ndarray
+    """The substance id of each row with shape=(n_rows,)."""
+
+
+def intern_substances(
+    data_frame: pandas.DataFrame, n_columns: Optional[int] = None
+) -> InternedSubstances:
+    """Interns the components and substances of each row of a curation frame
+    into integer ids. Substances are identified independently of the order of
+    their components.
+
+    Parameters
+    ----------
+    data_frame
+        The frame to intern the substances of.
+    n_columns
+        The number of component columns to consider. By default all of the
+        component columns in the frame are considered.
+    """
+
+    if n_columns is None:
+        n_columns = len(
+            [column for column in data_frame if re.fullmatch(r"Component \d+", column)]
+        )
+
+    columns = [f"Component {index + 1}" for index in range(n_columns)]
+
+    if len(data_frame) == 0 or n_columns == 0:
+
+        return InternedSubstances(
+            [],
+            numpy.full((len(data_frame), n_columns), -1),
+            numpy.zeros((0, n_columns), dtype=int),
+            numpy.zeros(len(data_frame), dtype=int),
+        )
+
+    component_ids, components = pandas.factorize(
+        data_frame[columns].values.ravel(), sort=True
+    )
+    component_ids = component_ids.reshape(len(data_frame), n_columns)
+
+    substances, substance_ids = numpy.unique(
+        numpy.sort(component_ids, axis=1), axis=0, return_inverse=True
+    )
+
+    return InternedSubstances(
+        [*components], component_ids, substances, substance_ids.ravel()
+    )
@@ -1,22 +1,38 @@
+import functools
 import os
-from typing import List
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Tuple
 
 import pandas
+from curation_cache import StageCache, load_frame, save_frame, schema_hash
+from curation_components import (
+    ConvertExcessDensityDataBatchedSchema,
+    FilterByChemistrySchema,
+    FilterBySmirksIndexSchema,
+    FilterBySubstancesBatchedSchema,
+    FilterDuplicatesBatchedSchema,
+    ImportThermoMLMirrorSchema,
+    SelectDataPointsBatchedSchema,
+    SelectDiverseSubstancesSchema,
+    workflow_schema,
+)
+from curation_graph import CurationGraph, apply_component
+from curation_profiler import CurationProfiler
+from data_set_builder import CuratedDataSet, data_set_from_pandas
 from nonbonded.library.models.authors import Author
-from nonbonded.library.models.datasets import DataSet
 from nonbonded.library.utilities.environments import ChemicalEnvironment
 from openff.evaluator.datasets.curation.components import (
-    conversion,
     filtering,
-    selection,
     thermoml,
 )
-from openff.evaluator.datasets.curation.components.selection import State, TargetState
-from openff.evaluator.datasets.curation.workflow import (
-    CurationWorkflow,
-    CurationWorkflowSchema,
+from openff.evaluator.datasets.curation.components.components import (
+    CurationComponentSchema,
 )
-from source_h_vap_data import source_enthalpy_of_vaporization
+from openff.evaluator.datasets.curation.components.selection import State, TargetState
+from openff.evaluator.datasets.curation.workflow import CurationWorkflowSchema
+from source_h_vap_data import source_data_hash, source_enthalpy_of_vaporization
+from substance_index import SubstanceIndex
+from thermoml_mirror import mirror_hash
 
 
 AUTHORS = [
@@ -36,6 +52,151 @@ N_PROCESSES = 4
 
 UPLOAD = False
 
+# Whether to check that each curated data set is identical to one built using the
+# (much slower) `DataSet.from_pandas`.
+VALIDATE_DATA_SETS = False
+
+# Whether to check that the batched selection of data points matches the selection
+# made by the built-in `SelectDataPoints` component.
+VALIDATE_SELECTIONS = False
+
+# Whether to check that the data imported from the local ThermoML mirror matches
+# that imported by the built-in `ImportThermoMLData` component.
+VALIDATE_THERMOML_MIRROR = False
+
+# Whether to check that each curated frame is identical to the one produced by
+# applying the same workflow directly to the uncompacted initial data.
+VALIDATE_COMPACTION = False
+
+# Whether to save a Parquet copy of each curated frame alongside each data set.
+WRITE_PARQUET = False
+
+INITIAL_DATA_PATH = "initial_data.feather"
+
+# A local mirror (either a directory or a tarball of XML files) of the ThermoML
+# archive. The archive is downloaded instead if no mirror is present.
+THERMOML_MIRROR_PATH = "thermoml-mirror"
+
+# Cache the output of each curation component so that changing a later component
+# does not require re-applying all of the components before it.
+STAGE_CACHE = StageCache(os.path.join("curation-cache", "stages"))
+
+# Whether to record the wall time, CPU time, memory and the number of data rows
+# and substances in and out of each curation component that is applied.
+PROFILE = False
+PROFILER = CurationProfiler(os.path.join("curation-cache", "profile"))
+
+# Whether to store the curated data of each hand selected training system
+# separately, so that adding or removing a system only requires that system to
+# be curated rather than all of them.
+INCREMENTAL_CURATION = True
+
+
+def initial_data_schema() -> CurationWorkflowSchema:
+    """Returns the schema used to pull all of the available (and parsable) data
+    from the ThermoML archive and apply a set of common filters."""
+
+    row_filters = [
+        # Retain only data points measured for pure and binary systems.
+        filtering.FilterByNComponentsSchema(n_components=[1, 2]),
+        # Filter out only the properties of interest.
+        filtering.FilterByPropertyTypesSchema(
+            property_types=[
+                "Density",
+                "EnthalpyOfVaporization",
+                "EnthalpyOfMixing",
+                "ExcessMolarVolume",
+            ],
+            n_components={
+                "Density": [1, 2],
+                "EnthalpyOfVaporization": [1, 2],
+                "EnthalpyOfMixing": [2],
+                "ExcessMolarVolume": [2],
+            },
+        ),
+    ]
+    state_filters = [
+        # Filter by temperature and pressure,
+        filtering.FilterByTemperatureSchema(
+            minimum_temperature=288.15, maximum_temperature=323.15
+        ),
+        filtering.FilterByPressureSchema(
+            minimum_pressure=0.95 * 101.325, maximum_pressure=1.05 * 101.325
+        ),
+    ]
+
+    if os.path.exists(THERMOML_MIRROR_PATH):
+
+        # Stream the data from the local mirror through the filters on the number
+        # of components and property type, so that the whole archive never needs
+        # to be held in memory at once. Duplicates always share both, and so these
+        # filters commute with removing duplicates. The state filters do not (the
+        # retained duplicate may lie just outside of a bound when the one which
+        # was removed did not), and so are only applied after duplicates have been
+        # removed, as in the baseline workflow.
+        import_schemas = [
+            ImportThermoMLMirrorSchema(
+                mirror_path=THERMOML_MIRROR_PATH,
+                row_filters=row_filters,
+                validate_mirror=VALIDATE_THERMOML_MIRROR,
+            ),
+            # Remove duplicate data
+            FilterDuplicatesBatchedSchema(),
+            *state_filters,
+        ]
+
+    else:
+
+        import_schemas = [
+            # Pull down the data from ThermoML.
+            thermoml.ImportThermoMLDataSchema(),
+            row_filters[0],
+            # Remove duplicate data
+            FilterDuplicatesBatchedSchema(),
+            row_filters[1],
+            *state_filters,
+        ]
+
+    return workflow_schema(
+        component_schemas=[
+            *import_schemas,
+            # Remove any elements which aren't of interest for this study, filter
+            # out molecules with undefined stereochemistry, charged or ionic
+            # liquids, and any molecules which do not contain the chemical
+            # functionality of interest.
+            FilterByChemistrySchema(
+                allowed_elements=["C", "O", "H"],
+                environments=[
+                    ChemicalEnvironment.Hydroxy,
+                    ChemicalEnvironment.CarboxylicAcidEster,
+                    ChemicalEnvironment.CarboxylicAcid,
+                    ChemicalEnvironment.Ether,
+                    ChemicalEnvironment.Ketone,
+                    ChemicalEnvironment.Alkane,
+                ],
+            ),
+        ]
+    )
+
+
+def build_data_set(
+    data_frame: pandas.DataFrame,
+    identifier: str,
+    description: str,
+    authors: List[Author],
+) -> CuratedDataSet:
+    """Builds a data set from a curated data frame."""
+
+    data_set = data_set_from_pandas(
+        data_frame=data_frame,
+        identifier=identifier,
+        description=description,
+        authors=authors,
+        validate=VALIDATE_DATA_SETS,
+    )
+
+    return CuratedDataSet(data_set, data_frame)
+
 
 def prepare_initial_data() -> pandas.DataFrame:
     """This function pulls all of the available (and parsable) data from
@@ -51,80 +212,91 @@ def prepare_initial_data() -> pandas.DataFrame:
     """
 
     # Import the sourced enthalpy of vaporization data.
-    sourced_h_vap_data = source_enthalpy_of_vaporization()
+    initial_data = source_enthalpy_of_vaporization()
+
+    # Pull down all of the usable data from ThermoML. The components are applied
+    # one at a time so that the built-in components are passed frames without
+    # categorical columns, and so that each can be profiled.
+    for index, component_schema in enumerate(initial_data_schema().component_schemas):
+
+        apply_function = functools.partial(
+            apply_component, initial_data, component_schema, N_PROCESSES
+        )
+
+        initial_data = (
+            apply_function()
+            if not PROFILE
+            else PROFILER.profile(
+                f"initial-data-{index}",
+                component_schema,
+                initial_data,
+                N_PROCESSES,
+                apply_function,
+            )
+        )
+
+    return initial_data
+
 
-    # Pull down all of the usable data from ThermoML.
-    initial_data = CurationWorkflow.apply(
-        data_set=sourced_h_vap_data,
-        schema=CurationWorkflowSchema(
+def curate_selected_substances(
+    curation_graph: CurationGraph,
+    prefix_schemas: List[CurationComponentSchema],
+    substances: List[Tuple[str, ...]],
+    suffix_schemas: List[CurationComponentSchema],
+) -> pandas.DataFrame:
+    """Applies a curation workflow which retains only the data measured for a
+    list of hand selected substances.
+
+    Parameters
+    ----------
+    curation_graph
+        The graph used to apply the workflow.
+    prefix_schemas
+        The components to apply before selecting the substances.
+    substances
+        The SMILES patterns of the components of each substance to retain.
+    suffix_schemas
+        The components to apply to the data of the selected substances. Each must
+        treat the data of each substance independently.
+    """
+
+    if INCREMENTAL_CURATION:
+
+        return curation_graph.apply_per_substance(
+            workflow_schema(prefix_schemas),
+            substances,
+            workflow_schema(suffix_schemas),
+            validate=VALIDATE_COMPACTION,
+        )
+
+    return curation_graph.apply(
+        workflow_schema(
             component_schemas=[
-                # Pull down the data from ThermoML.
-                thermoml.ImportThermoMLDataSchema(),
-                # Retain only data points measured for pure and binary systems.
-                filtering.FilterByNComponentsSchema(n_components=[1, 2]),
-                # Remove duplicate data
-                filtering.FilterDuplicatesSchema(),
-                # Filter out only the properties of interest.
-                filtering.FilterByPropertyTypesSchema(
-                    property_types=[
-                        "Density",
-                        "EnthalpyOfVaporization",
-                        "EnthalpyOfMixing",
-                        "ExcessMolarVolume",
-                    ],
-                    n_components={
-                        "Density": [1, 2],
-                        "EnthalpyOfVaporization": [1, 2],
-                        "EnthalpyOfMixing": [2],
-                        "ExcessMolarVolume": [2],
-                    },
-                ),
-                # Filter by temperature and pressure,
-                filtering.FilterByTemperatureSchema(
-                    minimum_temperature=288.15, maximum_temperature=323.15
-                ),
-                filtering.FilterByPressureSchema(
-                    minimum_pressure=0.95 * 101.325, maximum_pressure=1.05 * 101.325
-                ),
-                # Remove any elements which aren't of interest for this study.
-                filtering.FilterByElementsSchema(allowed_elements=["C", "O", "H"]),
-                # Filter out molecules with undefined stereochemistry
-                filtering.FilterByStereochemistrySchema(),
-                # Filter out charged or ionic liquids,
-                filtering.FilterByChargedSchema(),
-                filtering.FilterByIonicLiquidSchema(),
-                # Filter out any molecules which do not contain the chemical
-                # functionality of interest.
-                filtering.FilterByEnvironmentsSchema(
-                    environments=[
-                        ChemicalEnvironment.Hydroxy,
-                        ChemicalEnvironment.CarboxylicAcidEster,
-                        ChemicalEnvironment.CarboxylicAcid,
-                        ChemicalEnvironment.Ether,
-                        ChemicalEnvironment.Ketone,
-                        ChemicalEnvironment.Alkane,
-                    ]
-                ),
+                *prefix_schemas,
+                FilterBySubstancesBatchedSchema(substances_to_include=substances),
+                *suffix_schemas,
             ]
         ),
-        n_processes=N_PROCESSES,
+        validate=VALIDATE_COMPACTION,
     )
 
-    return initial_data
-
 
-def curate_pure_training_sets(initial_data: pandas.DataFrame) -> List[DataSet]:
+def curate_pure_training_sets(
+    curation_graph: CurationGraph,
+) -> List[CuratedDataSet]:
     """Curate the pure training set.
 
     Parameters
     ----------
-    initial_data
-        A data frame containing all of the available data to
-        select data points from.
+    curation_graph
+        The graph used to apply curation workflows to the data frame containing
+        all of the available data to select data points from.
     """
 
-    schema = CurationWorkflowSchema(
-        component_schemas=[
+    # Apply the curation schema to yield the training set.
+    training_data_frame = curate_selected_substances(
+        curation_graph,
+        prefix_schemas=[
             # Retain only enthalpy of vaporization and density data points
             # which were measured for the same pure systems.
             filtering.FilterByPropertyTypesSchema(
@@ -132,46 +304,46 @@ def curate_pure_training_sets(initial_data: pandas.DataFrame) -> List[DataSet]:
                 n_components={"Density": [1], "EnthalpyOfVaporization": [1]},
                 strict=True,
             ),
-            # Filter out all but the hand selected systems.
-            filtering.FilterBySmilesSchema(
-                smiles_to_include=[
-                    # Ethers
-                    "C1COCCO1",
-                    "C1CCOCC1",
-                    "COC(C)(C)C",
-                    "CC(C)OC(C)C",
-                    "CCCCOCCCC",
-                    # Ketones
-                    "O=C1CCCC1",
-                    "CCCC(C)=O",
-                    "O=C1CCCCC1",
-                    "O=C1CCCCCC1",
-                    # Alcohols
-                    "CO",
-                    "CCO",
-                    "CCCO",
-                    "CCCCO",
-                    "CC(C)(C)O",
-                    "CC(C)O",
-                    "CC(C)CO",
-                    # Esters
-                    "CC(=O)O",
-                    "COC=O",
-                    "CCOC(C)=O",
-                    "CCOC(=O)CC(=O)OCC",
-                    "CCCCOC(C)=O",
-                    "CCCOC(C)=O",
-                    # Alkanes
-                    "C1CCCCC1",
-                    "CCCCCC",
-                    "CC1CCCCC1",
-                    "CCCCCCC",
-                    "CC(C)CC(C)(C)C",
-                    "CCCCCCCCCC",
-                ]
-            ),
+        ],
+        # Filter out all but the hand selected systems.
+        substances=[
+            # Ethers
+            ("C1COCCO1",),
+            ("C1CCOCC1",),
+            ("COC(C)(C)C",),
+            ("CC(C)OC(C)C",),
+            ("CCCCOCCCC",),
+            # Ketones
+            ("O=C1CCCC1",),
+            ("CCCC(C)=O",),
+            ("O=C1CCCCC1",),
+            ("O=C1CCCCCC1",),
+            # Alcohols
+            ("CO",),
+            ("CCO",),
+            ("CCCO",),
+            ("CCCCO",),
+            ("CC(C)(C)O",),
+            ("CC(C)O",),
+            ("CC(C)CO",),
+            # Esters
+            ("CC(=O)O",),
+            ("COC=O",),
+            ("CCOC(C)=O",),
+            ("CCOC(=O)CC(=O)OCC",),
+            ("CCCCOC(C)=O",),
+            ("CCCOC(C)=O",),
+            # Alkanes
+            ("C1CCCCC1",),
+            ("CCCCCC",),
+            ("CC1CCCCC1",),
+            ("CCCCCCC",),
+            ("CC(C)CC(C)(C)C",),
+            ("CCCCCCCCCC",),
+        ],
+        suffix_schemas=[
             # Select data points close to ambient conditions
-            selection.SelectDataPointsSchema(
+            SelectDataPointsBatchedSchema(
                 target_states=[
                     TargetState(
                         property_types=[("Density", 1), ("EnthalpyOfVaporization", 1)],
@@ -183,14 +355,12 @@ def curate_pure_training_sets(initial_data: pandas.DataFrame) -> List[DataSet]:
                             )
                         ],
                     )
-                ]
+                ],
+                validate_selection=VALIDATE_SELECTIONS,
             ),
         ],
     )
 
-    # Apply the curation schema to yield the training set.
-    training_data_frame = CurationWorkflow.apply(initial_data, schema, N_PROCESSES)
-
     rho_training_data = training_data_frame[
         training_data_frame["Density Value (g / ml)"].notna()
     ]
@@ -199,7 +369,7 @@ def curate_pure_training_sets(initial_data: pandas.DataFrame) -> List[DataSet]:
     ]
 
     training_sets = [
-        DataSet.from_pandas(
+        build_data_set(
             data_frame=rho_training_data,
             identifier="bmfs-exp-train-rho",
             description="A data set composed of density measurements made for "
@@ -214,7 +384,7 @@ def curate_pure_training_sets(initial_data: pandas.DataFrame) -> List[DataSet]:
             "the `binary-mixture` project",
             authors=AUTHORS,
         ),
-        DataSet.from_pandas(
+        build_data_set(
             data_frame=h_vap_training_data,
             identifier="bmfs-exp-train-h-vap",
             description="A data set composed of enthalpy of vaporization "
@@ -235,24 +405,27 @@ def curate_pure_training_sets(initial_data: pandas.DataFrame) -> List[DataSet]:
     return training_sets
 
 
-def curate_mixture_training_sets(initial_data: pandas.DataFrame) -> List[DataSet]:
+def curate_mixture_training_sets(
+    curation_graph: CurationGraph,
+) -> List[CuratedDataSet]:
     """Curate the mixture training set.
 
     Parameters
     ----------
-    initial_data
-        A data frame containing all of the available data to
-        select data points from.
+    curation_graph
+        The graph used to apply curation workflows to the data frame containing
+        all of the available data to select data points from.
     """
 
     # Apply the curation schema to yield the training set.
-    schema = CurationWorkflowSchema(
-        component_schemas=[
+    training_data_frame = curate_selected_substances(
+        curation_graph,
+        prefix_schemas=[
             # Attempt to inter-convert binary density and
             # excess molar volume data where possible.
-            conversion.ConvertExcessDensityDataSchema(),
+            ConvertExcessDensityDataBatchedSchema(),
             # Remove any duplicate data.
-            filtering.FilterDuplicatesSchema(),
+            FilterDuplicatesBatchedSchema(),
             # Retain only enthalpy of mixing, and density data points which were
             # measured for the same binary systems.
             filtering.FilterByNComponentsSchema(n_components=[2]),
@@ -260,48 +433,48 @@ def curate_mixture_training_sets(initial_data: pandas.DataFrame) -> List[DataSet
                 property_types=["Density", "EnthalpyOfMixing"],
                 strict=True,
             ),
-            # Filter out all but the hand selected systems.
-            filtering.FilterBySubstancesSchema(
-                substances_to_include=[
-                    # Ether - Alkane
-                    ("CCCCOCCCC", "CC(C)CC(C)(C)C"),
-                    ("C1CCOCC1", "CCCCCCC"),
-                    ("COC(C)(C)C", "CCCCCCCCCC"),
-                    ("CC(C)OC(C)C", "CC(C)CC(C)(C)C"),
-                    ("CC(C)OC(C)C", "CCCCCCC"),
-                    ("C1CCOCC1", "CCCCCC"),
-                    ("C1CCOCC1", "C1CCCCC1"),
-                    # Alcohol - Alkane
-                    ("CCCO", "C1CCCCC1"),
-                    ("CCCO", "CC(C)CC(C)(C)C"),
-                    ("CCCO", "CC1CCCCC1"),
-                    ("CCCCO", "CC(C)CC(C)(C)C"),
-                    ("CCCCO", "CCCCCC"),
-                    ("CCCCO", "CC1CCCCC1"),
-                    ("CCCCO", "CCCCCCC"),
-                    ("CCO", "CC(C)CC(C)(C)C"),
-                    ("CCO", "CCCCCCC"),
-                    # Ether - Ketone
-                    ("C1CCOCC1", "O=C1CCCC1"),
-                    ("C1CCOCC1", "O=C1CCCCC1"),
-                    ("C1CCOCC1", "CCCC(C)=O"),
-                    ("C1COCCO1", "O=C1CCCC1"),
-                    ("C1COCCO1", "O=C1CCCCC1"),
-                    ("C1COCCO1", "CCCC(C)=O"),
-                    ("C1COCCO1", "O=C1CCCCCC1"),
-                    # Alcohol - Ester / Acid
-                    ("CO", "COC=O"),
-                    ("CO", "CCOC(=O)CC(=O)OCC"),
-                    ("CCO", "CC(=O)O"),
-                    ("CCO", "CCOC(C)=O"),
-                    ("CCO", "CCOC(=O)CC(=O)OCC"),
-                    ("CCCCO", "CCOC(=O)CC(=O)OCC"),
-                    ("CC(C)O", "CCOC(=O)CC(=O)OCC"),
-                    ("CC(C)CO", "CCOC(=O)CC(=O)OCC"),
-                    ("CC(C)(C)O", "COC=O"),
-                    ("CC(C)(C)O", "CCCCOC(C)=O"),
-                ]
-            ),
+        ],
+        # Filter out all but the hand selected systems.
+        substances=[
+            # Ether - Alkane
+            ("CCCCOCCCC", "CC(C)CC(C)(C)C"),
+            ("C1CCOCC1", "CCCCCCC"),
+            ("COC(C)(C)C", "CCCCCCCCCC"),
+            ("CC(C)OC(C)C", "CC(C)CC(C)(C)C"),
+            ("CC(C)OC(C)C", "CCCCCCC"),
+            ("C1CCOCC1", "CCCCCC"),
+            ("C1CCOCC1", "C1CCCCC1"),
+            # Alcohol - Alkane
+            ("CCCO", "C1CCCCC1"),
+            ("CCCO", "CC(C)CC(C)(C)C"),
+            ("CCCO", "CC1CCCCC1"),
+            ("CCCCO", "CC(C)CC(C)(C)C"),
+            ("CCCCO", "CCCCCC"),
+            ("CCCCO", "CC1CCCCC1"),
+            ("CCCCO", "CCCCCCC"),
+            ("CCO", "CC(C)CC(C)(C)C"),
+            ("CCO", "CCCCCCC"),
+            # Ether - Ketone
+            ("C1CCOCC1", "O=C1CCCC1"),
+            ("C1CCOCC1", "O=C1CCCCC1"),
+            ("C1CCOCC1", "CCCC(C)=O"),
+            ("C1COCCO1", "O=C1CCCC1"),
+            ("C1COCCO1", "O=C1CCCCC1"),
+            ("C1COCCO1", "CCCC(C)=O"),
+            ("C1COCCO1", "O=C1CCCCCC1"),
+            # Alcohol - Ester / Acid
+            ("CO", "COC=O"),
+            ("CO", "CCOC(=O)CC(=O)OCC"),
+            ("CCO", "CC(=O)O"),
+            ("CCO", "CCOC(C)=O"),
+            ("CCO", "CCOC(=O)CC(=O)OCC"),
+            ("CCCCO", "CCOC(=O)CC(=O)OCC"),
+            ("CC(C)O", "CCOC(=O)CC(=O)OCC"),
+            ("CC(C)CO", "CCOC(=O)CC(=O)OCC"),
+            ("CC(C)(C)O", "COC=O"),
+            ("CC(C)(C)O", "CCCCOC(C)=O"),
+        ],
+        suffix_schemas=[
             # Filter to a narrower mole fraction range. This should help the
             # state point selection algorithm choose data points closer to the
             # targets.
@@ -309,7 +482,7 @@ def curate_mixture_training_sets(initial_data: pandas.DataFrame) -> List[DataSet
                 mole_fraction_ranges={2: [[(0.1, 0.9)]]}
             ),
             # Select data points close to ambient conditions
-            selection.SelectDataPointsSchema(
+            SelectDataPointsBatchedSchema(
                 target_states=[
                     TargetState(
                         property_types=[("Density", 2), ("EnthalpyOfMixing", 2)],
@@ -331,11 +504,11 @@ def curate_mixture_training_sets(initial_data: pandas.DataFrame) -> List[DataSet
                             ),
                         ],
                     )
-                ]
+                ],
+                validate_selection=VALIDATE_SELECTIONS,
             ),
-        ]
+        ],
     )
-    training_data_frame = CurationWorkflow.apply(initial_data, schema, N_PROCESSES)
 
     rho_x_training_data = training_data_frame[
         training_data_frame["Density Value (g / ml)"].notna()
@@ -345,7 +518,7 @@ def curate_mixture_training_sets(initial_data: pandas.DataFrame) -> List[DataSet
     ]
 
     training_sets = [
-        DataSet.from_pandas(
+        build_data_set(
             data_frame=h_mix_training_data,
             identifier="bmfs-exp-train-h-mix",
             description="A data set composed of enthalpy of mixing measurements "
@@ -365,7 +538,7 @@ def curate_mixture_training_sets(initial_data: pandas.DataFrame) -> List[DataSet
             "the `binary-mixture` project",
             authors=AUTHORS,
         ),
-        DataSet.from_pandas(
+        build_data_set(
             data_frame=rho_x_training_data,
             identifier="bmfs-exp-train-rho-x",
             description="A data set composed of density measurements made for "
@@ -392,25 +565,22 @@ def curate_mixture_training_sets(initial_data: pandas.DataFrame) -> List[DataSet
 
 
 def curate_pure_test_set(
-    initial_data: pandas.DataFrame, training_data: List[DataSet]
-) -> List[DataSet]:
+    curation_graph: CurationGraph, training_index: SubstanceIndex
+) -> List[CuratedDataSet]:
     """Curate the test set of pure systems. This mostly contains hand
     curated enthalpy of vaporization measurements and density measurements
     made for the same systems.
     """
     sourced_h_vap_data = source_enthalpy_of_vaporization()
-    sourced_components = {*sourced_h_vap_data["Component 1"].unique()}
 
-    training_components = {
-        data_entry.components[0].smiles
-        for data_set in training_data
-        for data_entry in data_set.entries
-        if len(data_entry.components) == 1
+    # Retain only the hand selected systems which aren't in a training set.
+    test_components = {
+        *sourced_h_vap_data["Component 1"][
+            training_index.exclusion_mask(sourced_h_vap_data)
+        ].unique()
     }
 
-    test_components = sourced_components - training_components
-
-    schema = CurationWorkflowSchema(
+    schema = workflow_schema(
         component_schemas=[
             # Retain only enthalpy of vaporization and density data points
             # which were measured for the same pure systems.
@@ -422,7 +592,7 @@ def curate_pure_test_set(
             # Filter out all but the hand selected systems.
             filtering.FilterBySmilesSchema(smiles_to_include=[*test_components]),
             # Select data points close to ambient conditions
-            selection.SelectDataPointsSchema(
+            SelectDataPointsBatchedSchema(
                 target_states=[
                     TargetState(
                         property_types=[("Density", 1), ("EnthalpyOfVaporization", 1)],
@@ -434,13 +604,14 @@ def curate_pure_test_set(
                             )
                         ],
                     )
-                ]
+                ],
+                validate_selection=VALIDATE_SELECTIONS,
             ),
         ],
     )
 
     # Apply the curation schema to yield the test set.
-    test_data_frame = CurationWorkflow.apply(initial_data, schema, N_PROCESSES)
+    test_data_frame = curation_graph.apply(schema, validate=VALIDATE_COMPACTION)
 
     rho_test_data = test_data_frame[test_data_frame["Density Value (g / ml)"].notna()]
     h_vap_test_data = test_data_frame[
@@ -448,7 +619,7 @@ def curate_pure_test_set(
     ]
 
     test_sets = [
-        DataSet.from_pandas(
+        build_data_set(
             data_frame=rho_test_data,
             identifier="bmfs-exp-test-rho",
             description="A data set composed of density measurements made for "
@@ -459,7 +630,7 @@ def curate_pure_test_set(
             "`expanded` study as part of the `binary-mixture` project",
             authors=AUTHORS,
         ),
-        DataSet.from_pandas(
+        build_data_set(
             data_frame=h_vap_test_data,
             identifier="bmfs-exp-test-h-vap",
             description="A data set composed of enthalpy of vaporization "
@@ -477,24 +648,19 @@ def curate_pure_test_set(
 
 
 def curate_mixture_test_set(
-    initial_data: pandas.DataFrame, training_data: List[DataSet]
-) -> List[DataSet]:
+    curation_graph: CurationGraph, training_index: SubstanceIndex
+) -> List[CuratedDataSet]:
     """Curate the test set of mixture systems."""
 
-    training_systems = {
-        tuple(component.smiles for component in data_entry.components)
-        for data_set in training_data
-        for data_entry in data_set.entries
-        if len(data_entry.components) == 2
-    }
+    training_systems = training_index.substances(n_components=2)
 
-    schema = CurationWorkflowSchema(
+    schema = workflow_schema(
         component_schemas=[
             # Attempt to inter-convert binary density and
             # excess molar volume data where possible.
-            conversion.ConvertExcessDensityDataSchema(),
+            ConvertExcessDensityDataBatchedSchema(),
             # Remove any duplicate data.
-            filtering.FilterDuplicatesSchema(),
+            FilterDuplicatesBatchedSchema(),
             # Retain only enthalpy of mixing, density and excess molar volume
             # data points which were measured for the same binary systems.
             filtering.FilterByNComponentsSchema(n_components=[2]),
@@ -502,14 +668,12 @@ def curate_mixture_test_set(
                 property_types=["Density", "EnthalpyOfMixing", "ExcessMolarVolume"],
             ),
             # Filter out the training systems.
-            filtering.FilterBySubstancesSchema(
-                substances_to_exclude=[*training_systems]
-            ),
+            FilterBySubstancesBatchedSchema(substances_to_exclude=training_systems),
             # Filter out long chain molecules, 3 + 4 membered rings
             # and 1, 3 carbonyl compounds where one of the carbonyls
             # is a ketone (cases where the enol form may be present in
             # non-negligible amounts).
-            filtering.FilterBySmirksSchema(
+            FilterBySmirksIndexSchema(
                 smirks_to_exclude=[
                     # 3 + 4 membered rings.
                     "[#6r3]",
@@ -525,7 +689,7 @@ def curate_mixture_test_set(
             # Filter out any racemic mixtures
             filtering.FilterByRacemicSchema(),
             # Attempt to select a diverse number of systems to include
-            selection.SelectSubstancesSchema(
+            SelectDiverseSubstancesSchema(
                 target_environments=[
                     ChemicalEnvironment.Alcohol,
                     ChemicalEnvironment.CarboxylicAcidEster,
@@ -535,11 +699,11 @@ def curate_mixture_test_set(
                     ChemicalEnvironment.Alkane,
                 ],
                 n_per_environment=10,
-                substances_to_exclude=[*training_systems],
+                substances_to_exclude=training_systems,
                 per_property=True,
             ),
             # Select data points close to ambient conditions
-            selection.SelectDataPointsSchema(
+            SelectDataPointsBatchedSchema(
                 target_states=[
                     TargetState(
                         property_types=[
@@ -565,13 +729,14 @@ def curate_mixture_test_set(
                             ),
                         ],
                     )
-                ]
+                ],
+                validate_selection=VALIDATE_SELECTIONS,
             ),
         ],
     )
 
     # Apply the curation schema to yield the test set.
-    test_data_frame = CurationWorkflow.apply(initial_data, schema, N_PROCESSES)
+    test_data_frame = curation_graph.apply(schema, validate=VALIDATE_COMPACTION)
 
     rho_x_test_data = test_data_frame[test_data_frame["Density Value (g / ml)"].notna()]
     h_mix_test_data = test_data_frame[
@@ -582,7 +747,7 @@ def curate_mixture_test_set(
     ]
 
     test_sets = [
-        DataSet.from_pandas(
+        build_data_set(
             data_frame=rho_x_test_data,
             identifier="bmfs-exp-test-rho-x",
             description="A data set composed of density measurements made for "
@@ -596,7 +761,7 @@ def curate_mixture_test_set(
             "`expanded` study as part of the `binary-mixture` project",
             authors=AUTHORS,
         ),
-        DataSet.from_pandas(
+        build_data_set(
             data_frame=h_mix_test_data,
             identifier="bmfs-exp-test-h-mix",
             description="This data set is composed of enthalpy of mixing measurements "
@@ -610,7 +775,7 @@ def curate_mixture_test_set(
             "`expanded` study as part of the `binary-mixture` project",
             authors=AUTHORS,
         ),
-        DataSet.from_pandas(
+        build_data_set(
             data_frame=v_excess_test_data,
             identifier="bmfs-exp-test-v-ex",
             description="This data set is composed of excess molar volume measurements "
@@ -629,37 +794,160 @@ def curate_mixture_test_set(
     return test_sets
 
 
+def run_curations(
+    curation_graph: CurationGraph,
+    curations: List[Tuple[Callable[..., List[CuratedDataSet]], Tuple[Any, ...]]],
+    n_processes: int,
+) -> List[List[CuratedDataSet]]:
+    """Runs a set of independent curations concurrently on a process pool. The
+    budget of ``n_processes`` is divided between the concurrent curations so that
+    the machine is not oversubscribed.
+
+    Parameters
+    ----------
+    curation_graph
+        The graph used to apply the curation workflows.
+    curations
+        The curation functions to run, and any extra arguments to pass to them
+        after the curation graph.
+    n_processes
+        The total number of processes the curations may use.
+
+    Returns
+    -------
+        The data sets produced by each of the curations.
+    """
+
+    n_workers = max(1, min(len(curations), n_processes, os.cpu_count() or 1))
+    branch_graph = curation_graph.with_n_processes(max(1, n_processes // n_workers))
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+
+        futures = [
+            executor.submit(curation_function, branch_graph, *arguments)
+            for curation_function, arguments in curations
+        ]
+
+        return [future.result() for future in futures]
+
+
+def save_data_set(curated_data_set: CuratedDataSet, directory: str):
+    """Saves a curated data set as JSON, alongside its curated frame as CSV and,
+    optionally, as a Parquet sidecar which is much faster to load."""
+
+    data_set, data_frame = curated_data_set
+
+    # Drop the columns of the property types and components which are not present
+    # in this data set, as the curated frame retains them.
+    data_frame.dropna(axis=1, how="all").to_csv(
+        os.path.join(directory, f"{data_set.id}.csv"), index=False
+    )
+    data_set.to_file(os.path.join(directory, f"{data_set.id}.json"))
+
+    if WRITE_PARQUET:
+
+        data_frame.reset_index(drop=True).to_parquet(
+            os.path.join(directory, f"{data_set.id}.parquet")
+        )
+
+
 def main():
 
-    if not os.path.isfile("initial_data.csv"):
+    if PROFILE:
+        PROFILER.reset()
+
+    # The initial data also includes the hand sourced enthalpy of vaporization data.
+    initial_data_hash = schema_hash(
+        initial_data_schema().json(),
+        source_data_hash(),
+        *(
+            [mirror_hash(THERMOML_MIRROR_PATH)]
+            if os.path.exists(THERMOML_MIRROR_PATH)
+            else []
+        ),
+    )
+    initial_data = load_frame(INITIAL_DATA_PATH, initial_data_hash)
+
+    if initial_data is None:
 
         initial_data = prepare_initial_data()
         # Save a copy of the initial data for faster restarts.
-        initial_data.to_csv("initial_data.csv", index=False)
+        save_frame(initial_data, INITIAL_DATA_PATH, initial_data_hash)
 
-    initial_data = pandas.read_csv("initial_data.csv")
+    # Share the components which the different curations have in common through
+    # the stage cache.
+    curation_graph = CurationGraph(
+        initial_data, N_PROCESSES, STAGE_CACHE, PROFILER if PROFILE else None
+    )
 
-    training_sets: List[DataSet] = [
-        *curate_pure_training_sets(initial_data),
-        *curate_mixture_training_sets(initial_data),
+    # Only the test sets depend on the training sets, so the two training set
+    # curations, and then the two test set curations, can be run concurrently.
+    training_sets: List[CuratedDataSet] = [
+        data_set
+        for data_sets in run_curations(
+            curation_graph,
+            [(curate_pure_training_sets, ()), (curate_mixture_training_sets, ())],
+            N_PROCESSES,
+        )
+        for data_set in data_sets
     ]
-    test_sets: List[DataSet] = [
-        *curate_pure_test_set(initial_data, training_sets),
-        *curate_mixture_test_set(initial_data, training_sets),
+    # Index the training systems once so that they can be excluded from the
+    # test sets.
+    training_index = SubstanceIndex(data_frame for _, data_frame in training_sets)
+
+    test_sets: List[CuratedDataSet] = [
+        data_set
+        for data_sets in run_curations(
+            curation_graph,
+            [
+                (curate_pure_test_set, (training_index,)),
+                (curate_mixture_test_set, (training_index,)),
+            ],
+            N_PROCESSES,
+        )
+        for data_set in data_sets
     ]
 
+    # Make sure that none of the training systems have leaked into the test sets.
+    for data_set, data_frame in test_sets:
+
+        if training_index.mask(data_frame).any():
+
+            raise RuntimeError(
+                f"The {data_set.id} test set contains data points measured for "
+                f"systems which appear in a training set."
+            )
+
     # Save a copy of the curated data sets.
     os.makedirs("data-sets", exist_ok=True)
 
-    for data_set in [*training_sets, *test_sets]:
+    curated_data_sets = [*training_sets, *test_sets]
+
+    if UPLOAD:
+
+        curated_data_sets = [
+            CuratedDataSet(data_set.upload(), data_frame)
+            for data_set, data_frame in curated_data_sets
+        ]
+
+    with ThreadPoolExecutor(max_workers=len(curated_data_sets)) as executor:
+
+        futures = [
+            executor.submit(save_data_set, curated_data_set, "data-sets")
+            for curated_data_set in curated_data_sets
+        ]
+
+        for future in futures:
+            future.result()
 
-        if UPLOAD:
-            data_set = data_set.upload()
+    if PROFILE:
 
-        data_set.to_pandas().to_csv(
-            os.path.join("data-sets", f"{data_set.id}.csv"), index=False
+        print(
+            PROFILER.report(
+                os.path.join("curation-cache", "profile.json"),
+                os.path.join("curation-cache", "profile.csv"),
+            )
         )
-        data_set.to_file(os.path.join("data-sets", f"{data_set.id}.json"))
 
 
 if __name__ == "__main__":
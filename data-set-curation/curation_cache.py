@@ -0,0 +1,314 @@
+"""Utilities for caching the (potentially very large) data frames produced while
+curating the data sets, so that curations can be quickly restarted."""
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import List, Optional, Set
+
+import pandas
+import pyarrow
+import pyarrow.feather
+import pyarrow.ipc
+from compact_frames import CATEGORICAL_COLUMNS, FLOAT_COLUMNS, compact_frame
+from file_lock import file_lock
+from openff.evaluator.datasets.curation.components.components import (
+    CurationComponentSchema,
+)
+
+# Bump this whenever the on-disk format changes to invalidate any existing caches.
+CACHE_FORMAT_VERSION = 2
+
+_STRING_COLUMNS = [r"Id"]
+_INTEGER_COLUMNS = [r"N Components"]
+
+
+def column_type(column_name: str) -> Optional[pyarrow.DataType]:
+    """Returns the type that a column of a curation data frame should be stored as.
+    The repeated string columns are dictionary encoded, and so are loaded back as
+    categoricals.
+
+    Returns
+    -------
+        The type of the column, or ``None`` if the column is not one which is known
+        to appear in curation data frames.
+    """
+
+    for patterns, data_type in [
+        (_STRING_COLUMNS, pyarrow.string()),
+        (CATEGORICAL_COLUMNS, pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+        (_INTEGER_COLUMNS, pyarrow.int64()),
+        (FLOAT_COLUMNS, pyarrow.float64()),
+    ]:
+
+        if any(re.fullmatch(pattern, column_name) for pattern in patterns):
+            return data_type
+
+    return None
+
+
+def frame_schema(data_frame: pandas.DataFrame) -> pyarrow.Schema:
+    """Returns the explicit schema that a curation data frame is stored using. The
+    types of any columns which are not known to appear in curation data frames
+    (such as the columns of a new property type) are inferred."""
+
+    unknown_columns = [
+        column for column in data_frame.columns if column_type(column) is None
+    ]
+    inferred_schema = pyarrow.Schema.from_pandas(
+        data_frame[unknown_columns], preserve_index=False
+    )
+
+    return pyarrow.schema(
+        [
+            (column, column_type(column) or inferred_schema.field(column).type)
+            for column in data_frame.columns
+        ]
+    )
+
+
+def schema_hash(*sources: str) -> str:
+    """Computes the hash which is stored alongside a cached frame, and which is
+    used to detect whether the cache is stale.
+
+    Parameters
+    ----------
+    sources
+        Any text which defines the contents of the cache, for example the JSON
+        representation of the curation schema used to produce the frame.
+    """
+
+    hasher = hashlib.sha256(str(CACHE_FORMAT_VERSION).encode())
+
+    for source in sources:
+        hasher.update(hashlib.sha256(source.encode()).digest())
+
+    return hasher.hexdigest()
+
+
+def save_frame(data_frame: pandas.DataFrame, path: str, expected_hash: str):
+    """Saves a curation data frame to an (uncompressed, and hence memory
+    mappable) Arrow IPC file.
+
+    Parameters
+    ----------
+    data_frame
+        The frame to save.
+    path
+        The path to save the frame to.
+    expected_hash
+        The hash, as returned by ``schema_hash``, to store alongside the frame.
+    """
+
+    data_frame = compact_frame(data_frame)
+
+    schema = frame_schema(data_frame)
+    table = pyarrow.Table.from_pandas(data_frame, schema=schema, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), b"schema_hash": expected_hash.encode()}
+    )
+
+    # Concurrent curations may store the same frame at once, and so each writes to
+    # its own temporary file before atomically replacing the cached frame.
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix=f"{os.path.basename(path)}.",
+        suffix=".tmp",
+        delete=False,
+    ) as file:
+        temporary_path = file.name
+
+    try:
+        pyarrow.feather.write_feather(table, temporary_path, compression="uncompressed")
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def load_frame(
+    path: str, expected_hash: str, columns: Optional[List[str]] = None
+) -> Optional[pandas.DataFrame]:
+    """Loads a curation data frame saved by ``save_frame``. The file is memory
+    mapped so that only the requested columns are ever read from disk.
+
+    Parameters
+    ----------
+    path
+        The path to the cached frame.
+    expected_hash
+        The hash that the cached frame must have been stored with.
+    columns
+        The subset of columns to load. All columns are loaded by default.
+
+    Returns
+    -------
+        The cached frame, or ``None`` if there is no cached frame or the cache
+        is stale.
+    """
+
+    if not os.path.isfile(path):
+        return None
+
+    with pyarrow.memory_map(path, "r") as source:
+
+        reader = pyarrow.ipc.open_file(source)
+        metadata = reader.schema.metadata or {}
+
+        if metadata.get(b"schema_hash", b"").decode() != expected_hash:
+            return None
+
+        table = reader.read_all()
+
+        if columns is not None:
+            table = table.select(columns)
+
+        return table.to_pandas()
+
+
+def frame_hash(data_frame: pandas.DataFrame) -> str:
+    """Computes a hash of the contents of a data frame."""
+
+    hasher = hashlib.sha256("\n".join(data_frame.columns).encode())
+    hasher.update(
+        pandas.util.hash_pandas_object(data_frame, index=False).values.tobytes()
+    )
+
+    return hasher.hexdigest()
+
+
+class StageCache:
+    """An on-disk cache of the frames produced by each of the components of a
+    curation workflow.
+
+    The output of each component is keyed by a hash of its input frame and of its
+    serialized schema. Rather than re-hashing every intermediate frame, the key of
+    a component's input is taken to be the key of the component which produced it.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_size: int = 8 * 1024**3,
+        max_age: float = 30.0 * 24.0 * 60.0 * 60.0,
+    ):
+        """
+        Parameters
+        ----------
+        directory
+            The directory to store the cached frames in.
+        max_size
+            The maximum total size (bytes) of the cached frames. The least
+            recently used frames are evicted first once this is exceeded.
+        max_age
+            The maximum time (s) since a cached frame was last used before it is
+            evicted.
+        """
+
+        self.directory = directory
+
+        self.max_size = max_size
+        self.max_age = max_age
+
+        self._pinned_keys: Set[str] = set()
+
+    def pin(self, key: str):
+        """Marks a cached frame as one which should never be evicted, such as the
+        initial frame which every curation starts from. Pins are held by this
+        cache object (and any copies of it passed to other processes) rather
+        than being stored on disk."""
+        self._pinned_keys.add(key)
+
+    @staticmethod
+    def stage_key(input_key: str, component_schema: CurationComponentSchema) -> str:
+        """Returns the key of the frame produced by applying a component to the
+        frame with key ``input_key``."""
+        return schema_hash(input_key, component_schema.json())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.feather")
+
+    def lock(self, key: str):
+        """Returns a context which holds an exclusive, inter-process lock on the
+        frame with a given key, such that it is only computed by one process."""
+        return file_lock(self._path(key))
+
+    def contains(self, key: str) -> bool:
+        """Returns whether a frame with a given key has been cached."""
+        return os.path.isfile(self._path(key))
+
+    def load(self, key: str) -> Optional[pandas.DataFrame]:
+        """Loads a cached frame, returning ``None`` if it has not been cached."""
+
+        path = self._path(key)
+
+        # Frames may be evicted by curations running in other processes at any
+        # time. Marking the frame as recently used first makes this less likely.
+        try:
+            os.utime(path)
+            return load_frame(path, key)
+        except FileNotFoundError:
+            return None
+
+    def store(self, key: str, data_frame: pandas.DataFrame):
+        """Stores a frame in the cache, evicting old frames if needed."""
+
+        os.makedirs(self.directory, exist_ok=True)
+        save_frame(data_frame, self._path(key), key)
+
+        self.evict()
+
+    def evict(self):
+        """Removes any cached frames (and their lock files) which have not been used
+        within ``max_age``, and then the least recently used frames until the cache
+        is smaller than ``max_size``."""
+
+        if not os.path.isdir(self.directory):
+            return
+
+        cached_files = []
+
+        for file_name in os.listdir(self.directory):
+
+            if not file_name.endswith(".feather"):
+                continue
+            if file_name[: -len(".feather")] in self._pinned_keys:
+                continue
+
+            path = os.path.join(self.directory, file_name)
+
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+
+            cached_files.append((stat.st_mtime, stat.st_size, path))
+
+        cached_files = sorted(cached_files, reverse=True)
+
+        current_time = time.time()
+        total_size = 0
+
+        for last_used, size, path in cached_files:
+
+            total_size += size
+
+            if current_time - last_used <= self.max_age and total_size <= self.max_size:
+                continue
+
+            # Frames which are locked are being computed (or re-computed) by
+            # another curation, and so are left for a later eviction. The lock file
+            # is removed along with the frame while the lock is held.
+            try:
+                with file_lock(path, blocking=False):
+
+                    for file_path in [path, f"{path}.lock"]:
+
+                        try:
+                            os.unlink(file_path)
+                        except FileNotFoundError:
+                            pass
+
+            except BlockingIOError:
+                continue
@@ -0,0 +1,665 @@
+"""Curation components which complement those provided by the ``openff-evaluator``
+framework. Each component registers itself with the framework on import, and so
+may be used in curation workflows alongside the built-in components."""
+import itertools
+import re
+from typing import Dict, Iterable, List, Literal, Optional, Tuple, Union
+
+import numpy
+import pandas
+from compact_frames import expand_frame
+from curation_graph import apply_component
+from density_conversion import convert_excess_density_data
+from duplicate_filtering import filter_duplicates
+from fingerprints import fingerprint_table
+from openff.evaluator.datasets.curation.components.components import (
+    CurationComponent,
+    CurationComponentSchema,
+)
+from openff.evaluator.datasets.curation.components.filtering import (
+    FilterByNComponentsSchema,
+    FilterByPressureSchema,
+    FilterByPropertyTypesSchema,
+    FilterByTemperatureSchema,
+)
+from openff.evaluator.datasets.curation.components.selection import (
+    SelectDataPointsSchema,
+    SelectSubstances,
+    SelectSubstancesSchema,
+    TargetState,
+)
+from openff.evaluator.datasets.curation.workflow import CurationWorkflowSchema
+from openff.evaluator.utils.checkmol import ChemicalEnvironment
+from pydantic import Field, conint
+from smirks_index import smirks_index
+from state_selection import select_data_points
+from substance_features import environment_column, substance_feature_table
+from substance_index import substance_mask
+from thermoml_mirror import ThermoMLMirror
+
+
+def workflow_schema(
+    component_schemas: List[CurationComponentSchema],
+) -> CurationWorkflowSchema:
+    """Creates the schema of a curation workflow which may contain the components
+    defined in this module alongside the built-in components.
+
+    ``construct`` is used to skip the validation of the component schemas, which
+    would otherwise coerce them into one of the built-in schema types.
+    """
+    return CurationWorkflowSchema.construct(component_schemas=component_schemas)
+
+
+def component_columns(data_frame: pandas.DataFrame) -> List[str]:
+    """Returns the columns of a data frame which contain component SMILES."""
+    return [column for column in data_frame if re.fullmatch(r"Component \d+", column)]
+
+
+def unique_components(data_frame: pandas.DataFrame) -> List[str]:
+    """Returns the unique component SMILES which appear in a data frame."""
+
+    columns = component_columns(data_frame)
+
+    if len(columns) == 0 or len(data_frame) == 0:
+        return []
+
+    values = pandas.unique(data_frame[columns].values.ravel())
+    return sorted(smiles for smiles in values if isinstance(smiles, str))
+
+
+def component_mask(
+    data_frame: pandas.DataFrame, allowed_components: List[str]
+) -> numpy.ndarray:
+    """Returns a mask of the data rows whose components are all allowed.
+
+    Parameters
+    ----------
+    data_frame
+        The data frame to mask.
+    allowed_components
+        The SMILES patterns of the allowed components.
+    """
+
+    mask = numpy.ones(len(data_frame), dtype=bool)
+
+    for column in component_columns(data_frame):
+
+        mask &= (
+            data_frame[column].isna() | data_frame[column].isin(allowed_components)
+        ).values
+
+    return mask
+
+
+class ImportThermoMLMirrorSchema(CurationComponentSchema):
+
+    type: Literal["ImportThermoMLMirror"] = "ImportThermoMLMirror"
+
+    mirror_path: str = Field(
+        ...,
+        description="The path to a local mirror of the ThermoML archive, either a "
+        "directory or a tarball of ThermoML XML files.",
+    )
+
+    retain_uncertainties: bool = Field(
+        True,
+        description="If False, all uncertainties in measured property values will "
+        "be stripped from the final data set.",
+    )
+
+    row_filters: List[
+        Union[
+            FilterByNComponentsSchema,
+            FilterByPropertyTypesSchema,
+            FilterByTemperatureSchema,
+            FilterByPressureSchema,
+        ]
+    ] = Field(
+        default_factory=list,
+        description="Filters which only depend on the contents of each individual "
+        "data row, and which will be applied to the imported data (as well as to "
+        "the input data) in chunks as it is imported, such that only the rows which "
+        "pass the filters are ever held in memory at once. Note that filtering by "
+        "temperature or pressure does not commute with removing duplicates, as "
+        "the data points are compared at a rounded state.",
+    )
+    chunk_size: conint(gt=0) = Field(
+        100000,
+        description="The (approximate) number of data rows to apply the row "
+        "filters to at once.",
+    )
+
+    validate_mirror: bool = Field(
+        False,
+        description="Whether to check that the data imported for one of the files "
+        "in the mirror is identical to that imported by the built-in "
+        "``ImportThermoMLData`` component.",
+    )
+
+
+class ImportThermoMLMirror(CurationComponent):
+    """A component which imports data from a local mirror of the ThermoML archive
+    rather than downloading it, but which otherwise imports the same data as the
+    built-in ``ImportThermoMLData`` component.
+
+    Each file is parsed, and the parsed frames are post-processed and joined, in
+    the same way as by the built-in component. The frame parsed from each file in
+    the mirror is cached by the checksum of the file, such that only files which
+    are new or have changed since the last import are parsed. The parsed frames
+    are streamed through any row filters in chunks, such that the peak memory is
+    bounded by the chunk size and the number of rows which pass the filters,
+    rather than by the size of the archive.
+    """
+
+    @classmethod
+    def _filter_chunk(
+        cls,
+        data_frames: List[pandas.DataFrame],
+        schema: ImportThermoMLMirrorSchema,
+        n_processes: int,
+    ) -> pandas.DataFrame:
+
+        chunk = pandas.concat(data_frames, ignore_index=True, sort=False)
+
+        for row_filter in schema.row_filters:
+
+            if len(chunk) == 0:
+                break
+
+            chunk = apply_component(chunk, row_filter, n_processes)
+
+        return chunk
+
+    @classmethod
+    def _chunks(
+        cls, data_frames: Iterable[pandas.DataFrame], chunk_size: int
+    ) -> Iterable[List[pandas.DataFrame]]:
+        """Groups a stream of frames into chunks of at least ``chunk_size`` rows."""
+
+        chunk, n_rows = [], 0
+
+        for data_frame in data_frames:
+
+            chunk.append(data_frame)
+            n_rows += len(data_frame)
+
+            if n_rows < chunk_size:
+                continue
+
+            yield chunk
+            chunk, n_rows = [], 0
+
+        if len(chunk) > 0:
+            yield chunk
+
+    @classmethod
+    def _apply(
+        cls,
+        data_frame: pandas.DataFrame,
+        schema: ImportThermoMLMirrorSchema,
+        n_processes: int,
+    ) -> pandas.DataFrame:
+
+        mirror = ThermoMLMirror(schema.mirror_path)
+        thermoml_data_frames = mirror.file_frames(n_processes)
+
+        if not schema.retain_uncertainties:
+
+            # Drop the same columns as the built-in component does.
+            thermoml_data_frames = (
+                thermoml_data_frame.drop(
+                    columns=[
+                        column
+                        for column in thermoml_data_frame
+                        if column.find(" Uncertainty ") >= 0
+                    ]
+                )
+                for thermoml_data_frame in thermoml_data_frames
+            )
+
+        filtered_chunks = [
+            cls._filter_chunk(chunk, schema, n_processes)
+            for chunk in cls._chunks(
+                itertools.chain([data_frame], thermoml_data_frames), schema.chunk_size
+            )
+        ]
+
+        if schema.validate_mirror:
+            mirror.validate()
+
+        return pandas.concat(filtered_chunks, ignore_index=True, sort=False)
+
+
+class FilterDuplicatesBatchedSchema(CurationComponentSchema):
+
+    type: Literal["FilterDuplicatesBatched"] = "FilterDuplicatesBatched"
+
+    temperature_precision: conint(ge=0) = Field(
+        2,
+        description="The number of decimal places to compare temperatures (K) to.",
+    )
+    pressure_precision: conint(ge=0) = Field(
+        3,
+        description="The number of decimal places to compare pressures (kPa) to.",
+    )
+    mole_fraction_precision: conint(ge=0) = Field(
+        6,
+        description="The number of decimal places to compare mole fractions to.",
+    )
+
+
+class FilterDuplicatesBatched(CurationComponent):
+    """A component which removes duplicate data points in the same way as the
+    built-in ``FilterDuplicates`` component.
+
+    Each data point is keyed by its property type, phase, rounded state and its
+    components in a canonical order, such that duplicates are found by hashing
+    rather than by comparing data points pairwise, and such that data points
+    measured for the same substance but listed in a different component order are
+    also treated as duplicates. The same data point of each set of duplicates is
+    retained as by the built-in component, and the states of the retained data
+    points are rounded in the same way.
+    """
+
+    @classmethod
+    def _apply(
+        cls,
+        data_frame: pandas.DataFrame,
+        schema: FilterDuplicatesBatchedSchema,
+        n_processes: int,
+    ) -> pandas.DataFrame:
+
+        return filter_duplicates(
+            data_frame,
+            schema.temperature_precision,
+            schema.pressure_precision,
+            schema.mole_fraction_precision,
+        )
+
+
+class FilterBySubstancesBatchedSchema(CurationComponentSchema):
+
+    type: Literal["FilterBySubstancesBatched"] = "FilterBySubstancesBatched"
+
+    substances_to_include: Optional[List[Tuple[str, ...]]] = Field(
+        None,
+        description="The substances to retain, where each substance is defined by "
+        "the SMILES patterns of its components in any order.",
+    )
+    substances_to_exclude: Optional[List[Tuple[str, ...]]] = Field(
+        None,
+        description="The substances to filter out, where each substance is defined "
+        "by the SMILES patterns of its components in any order.",
+    )
+
+
+class FilterBySubstancesBatched(CurationComponent):
+    """A component which filters data points based on the substance they were
+    measured for, in the spirit of the built-in ``FilterBySubstances`` component.
+
+    Rather than comparing each data row against each substance, the substances
+    are hashed by their canonical keys and joined onto the interned substances
+    of the data rows.
+    """
+
+    @classmethod
+    def _apply(
+        cls,
+        data_frame: pandas.DataFrame,
+        schema: FilterBySubstancesBatchedSchema,
+        n_processes: int,
+    ) -> pandas.DataFrame:
+
+        mask = numpy.ones(len(data_frame), dtype=bool)
+
+        if schema.substances_to_include is not None:
+            mask &= substance_mask(data_frame, schema.substances_to_include)
+        if schema.substances_to_exclude is not None:
+            mask &= ~substance_mask(data_frame, schema.substances_to_exclude)
+
+        return data_frame[mask]
+
+
+class FilterByChemistrySchema(CurationComponentSchema):
+
+    type: Literal["FilterByChemistry"] = "FilterByChemistry"
+
+    allowed_elements: List[str] = Field(
+        ...,
+        description="Only molecules which only contain these elements will be "
+        "retained.",
+    )
+
+    filter_undefined_stereochemistry: bool = Field(
+        True,
+        description="Whether to filter out molecules which have undefined "
+        "stereochemistry.",
+    )
+    filter_charged: bool = Field(
+        True,
+        description="Whether to filter out molecules which contain any formally "
+        "charged atoms.",
+    )
+    filter_ionic_liquids: bool = Field(
+        True,
+        description="Whether to filter out components which are made up of "
+        "multiple molecules, such as ionic liquids.",
+    )
+
+    environments: List[ChemicalEnvironment] = Field(
+        default_factory=list,
+        description="If specified, only molecules which contain at least one of "
+        "these chemical environments will be retained.",
+    )
+
+
+class FilterByChemistry(CurationComponent):
+    """A component which combines the built-in element, stereochemistry, charge,
+    ionic liquid and chemical environment filters.
+
+    Rather than inspecting each data row, the features of each unique component
+    are retrieved from the substance feature table and the filters applied to
+    them, before the result is joined back onto the data rows. The cost of the
+    filter therefore scales with the number of unique components rather than
+    the number of data rows.
+    """
+
+    @classmethod
+    def _allowed_components(
+        cls, features: pandas.DataFrame, schema: FilterByChemistrySchema
+    ) -> pandas.Series:
+        """Returns a mask of the components in a feature table which pass the
+        filter."""
+
+        allowed_elements = {*schema.allowed_elements}
+
+        is_allowed = features["Parsed"].astype(bool) & features["Elements"].map(
+            lambda elements: {*elements.split(",")} <= allowed_elements
+        )
+
+        if schema.filter_undefined_stereochemistry:
+            is_allowed &= ~features["Undefined Stereochemistry"].astype(bool)
+        if schema.filter_charged:
+            is_allowed &= ~features["Charged Atoms"].astype(bool)
+        if schema.filter_ionic_liquids:
+            is_allowed &= ~features["Ionic Liquid"].astype(bool)
+
+        if len(schema.environments) > 0:
+
+            environment_columns = [
+                environment_column(environment) for environment in schema.environments
+            ]
+
+            is_allowed &= features["Environments Analysed"].astype(bool)
+            is_allowed &= features[environment_columns].astype(bool).any(axis=1)
+
+        return is_allowed
+
+    @classmethod
+    def _apply(
+        cls,
+        data_frame: pandas.DataFrame,
+        schema: FilterByChemistrySchema,
+        n_processes: int,
+    ) -> pandas.DataFrame:
+
+        features = substance_feature_table().features(
+            unique_components(data_frame), n_processes
+        )
+
+        is_allowed = cls._allowed_components(features, schema)
+        allowed_components = [*features.index[is_allowed.values]]
+
+        return data_frame[component_mask(data_frame, allowed_components)]
+
+
+class FilterBySmirksIndexSchema(CurationComponentSchema):
+
+    type: Literal["FilterBySmirksIndex"] = "FilterBySmirksIndex"
+
+    smirks_to_include: Optional[List[str]] = Field(
+        None,
+        description="Only data points measured for substances whose components "
+        "match at least one of these patterns will be retained (see "
+        "`allow_partial_inclusion`). This option is mutually exclusive with "
+        "`smirks_to_exclude`.",
+    )
+    smirks_to_exclude: Optional[List[str]] = Field(
+        None,
+        description="Any data points measured for substances which contain any "
+        "component matching any of these patterns will be removed. This option is "
+        "mutually exclusive with `smirks_to_include`.",
+    )
+
+    allow_partial_inclusion: bool = Field(
+        False,
+        description="If False, data points will only be retained if all of their "
+        "components match at least one of the `smirks_to_include` patterns. If True, "
+        "data points will be retained if any of their components match.",
+    )
+
+
+class FilterBySmirksIndex(CurationComponent):
+    """A component which filters data points in the same way as the built-in
+    ``FilterBySmirks`` component, but which looks up the patterns which each
+    unique component matches in the persistent SMIRKS index rather than
+    performing a substructure search for each data row.
+    """
+
+    @classmethod
+    def _apply(
+        cls,
+        data_frame: pandas.DataFrame,
+        schema: FilterBySmirksIndexSchema,
+        n_processes: int,
+    ) -> pandas.DataFrame:
+
+        if (schema.smirks_to_include is None) == (schema.smirks_to_exclude is None):
+
+            raise ValueError(
+                "Exactly one of `smirks_to_include` and `smirks_to_exclude` must be "
+                "specified."
+            )
+
+        patterns = (
+            schema.smirks_to_include
+            if schema.smirks_to_include is not None
+            else schema.smirks_to_exclude
+        )
+
+        is_match = smirks_index().matches_any(
+            unique_components(data_frame), patterns, n_processes
+        )
+        matching_components = [*is_match.index[is_match.values]]
+
+        if schema.smirks_to_include is not None and not schema.allow_partial_inclusion:
+            return data_frame[component_mask(data_frame, matching_components)]
+
+        any_match = numpy.zeros(len(data_frame), dtype=bool)
+
+        for column in component_columns(data_frame):
+            any_match |= data_frame[column].isin(matching_components).values
+
+        return data_frame[
+            any_match if schema.smirks_to_include is not None else ~any_match
+        ]
+
+
+class SelectDataPointsBatchedSchema(CurationComponentSchema):
+
+    type: Literal["SelectDataPointsBatched"] = "SelectDataPointsBatched"
+
+    target_states: List[TargetState] = Field(
+        ...,
+        description="A list of the target states for which we would ideally include "
+        "data points for (e.g. density data points measured at ambient conditions, "
+        "or for density AND enthalpy of mixing measurements made for systems with a "
+        "roughly 50:50 composition).",
+    )
+
+    validate_selection: bool = Field(
+        False,
+        description="Whether to check that the same data points are selected as "
+        "would be by the built-in ``SelectDataPoints`` component.",
+    )
+
+
+class SelectDataPointsBatched(CurationComponent):
+    """A component which selects the same data points as the built-in
+    ``SelectDataPoints`` component, but which processes all of the substances at
+    once using vectorized operations rather than looping over each substance in
+    turn.
+    """
+
+    @classmethod
+    def _apply(
+        cls,
+        data_frame: pandas.DataFrame,
+        schema: SelectDataPointsBatchedSchema,
+        n_processes: int,
+    ) -> pandas.DataFrame:
+
+        selected_data = select_data_points(data_frame, schema.target_states)
+
+        if schema.validate_selection:
+
+            expected_data = apply_component(
+                data_frame,
+                SelectDataPointsSchema(target_states=schema.target_states),
+                n_processes,
+            )
+
+            # The built-in component re-orders the components of each data point,
+            # and so the selections are compared by the ids of the data points.
+            if sorted(selected_data["Id"]) != sorted(expected_data["Id"]):
+
+                raise RuntimeError(
+                    "The data points selected by the batched component do not match "
+                    "those selected by the built-in `SelectDataPoints` component."
+                )
+
+        return selected_data
+
+
+class SelectDiverseSubstancesSchema(SelectSubstancesSchema):
+
+    type: Literal["SelectDiverseSubstances"] = "SelectDiverseSubstances"
+
+
+class SelectDiverseSubstances(SelectSubstances):
+    """A component which selects exactly the same substances as the built-in
+    ``SelectSubstances`` component, and in the same order, but which looks up
+    the distance between two substances from a similarity matrix rather than
+    re-computing the fingerprints of their components for every comparison.
+
+    The fingerprints of each unique component are retrieved from the persistent
+    fingerprint table, and the similarity matrix between them is computed once
+    and re-used for every property type and environment.
+    """
+
+    _similarity: Optional[Tuple[Dict[str, int], numpy.ndarray]] = None
+
+    @classmethod
+    def _component_distance(cls, smiles_a: str, smiles_b: str) -> float:
+
+        indices, similarity = cls._similarity
+        return 1.0 - float(similarity[indices[smiles_a], indices[smiles_b]])
+
+    @classmethod
+    def _compute_distance(
+        cls, mixture_a: Tuple[str, ...], mixture_b: Tuple[str, ...]
+    ) -> float:
+
+        if len(mixture_a) == 1 and len(mixture_b) == 1:
+            return cls._component_distance(mixture_a[0], mixture_b[0])
+
+        elif len(mixture_a) == 2 and len(mixture_b) == 2:
+
+            # As in the built-in component, the components are paired up in the
+            # way which minimises the sum of their distances.
+            return min(
+                cls._component_distance(mixture_a[0], mixture_b[0])
+                + cls._component_distance(mixture_a[1], mixture_b[1]),
+                cls._component_distance(mixture_a[1], mixture_b[0])
+                + cls._component_distance(mixture_a[0], mixture_b[1]),
+            )
+
+        raise ValueError(
+            "The distance can only be computed between two pure substances or two "
+            "binary substances."
+        )
+
+    @classmethod
+    def _apply(
+        cls,
+        data_frame: pandas.DataFrame,
+        schema: SelectDiverseSubstancesSchema,
+        n_processes: int,
+    ) -> pandas.DataFrame:
+
+        smiles, similarity = fingerprint_table().similarity_matrix(
+            unique_components(data_frame), n_processes
+        )
+
+        cls._similarity = (
+            {pattern: index for index, pattern in enumerate(smiles)},
+            similarity,
+        )
+
+        # The selection itself is made by the built-in component, which expects a
+        # frame without categorical columns.
+        try:
+            return super()._apply(expand_frame(data_frame), schema, n_processes)
+        finally:
+            cls._similarity = None
+
+
+class ConvertExcessDensityDataBatchedSchema(CurationComponentSchema):
+
+    type: Literal["ConvertExcessDensityDataBatched"] = "ConvertExcessDensityDataBatched"
+
+    temperature_precision: int = Field(
+        2,
+        description="The number of decimal places to compare temperatures (K) to "
+        "when matching pure densities to binary data points.",
+    )
+    pressure_precision: int = Field(
+        3,
+        description="The number of decimal places to compare pressures (kPa) to "
+        "when matching pure densities to binary data points.",
+    )
+
+
+class ConvertExcessDensityDataBatched(CurationComponent):
+    """A component which converts binary mass density data into excess molar volume
+    data, and vice versa, where the pure densities of both components were measured
+    at the same state, in the spirit of the built-in ``ConvertExcessDensityData``
+    component.
+
+    The pure densities are looked up from a hashed index and all of the
+    conversions computed in a single vectorized pass, with the molecular weights of
+    the components retrieved from the substance feature table.
+    """
+
+    @classmethod
+    def _apply(
+        cls,
+        data_frame: pandas.DataFrame,
+        schema: ConvertExcessDensityDataBatchedSchema,
+        n_processes: int,
+    ) -> pandas.DataFrame:
+
+        features = substance_feature_table().features(
+            unique_components(data_frame), n_processes
+        )
+
+        converted_data = convert_excess_density_data(
+            data_frame,
+            features["Molecular Weight"].astype(float),
+            schema.temperature_precision,
+            schema.pressure_precision,
+        )
+
+        return pandas.concat(
+            [data_frame, converted_data], ignore_index=True, sort=False
+        )
@@ -0,0 +1,418 @@
+"""Utilities for applying multiple curation workflows to the same data, computing
+any components which the workflows have in common only once."""
+import copy
+import functools
+import json
+from typing import List, Optional, Sequence, Tuple
+
+import pandas
+from compact_frames import compact_frame, expand_frame
+from curation_cache import StageCache, frame_hash, schema_hash
+from curation_profiler import CurationProfiler
+from openff.evaluator.datasets.curation.components.components import (
+    CurationComponentSchema,
+)
+from openff.evaluator.datasets.curation.components.filtering import (
+    FilterBySubstancesSchema,
+)
+from openff.evaluator.datasets.curation.workflow import (
+    CurationWorkflow,
+    CurationWorkflowSchema,
+)
+from substance_index import substance_key, substance_mask
+
+
+def apply_component(
+    data_frame: pandas.DataFrame,
+    component_schema: CurationComponentSchema,
+    n_processes: int,
+) -> pandas.DataFrame:
+    """Applies a single curation component to a data frame, returning the output
+    in its compact form.
+
+    Only the components defined in this package operate on compact frames. The
+    built-in components are passed the frame with its categorical columns
+    converted back to plain objects, as they group by and concatenate these
+    columns in ways which are not safe for categoricals.
+    """
+
+    if type(component_schema).__module__.startswith("openff.evaluator."):
+        data_frame = expand_frame(data_frame)
+
+    # ``construct`` is used so that the component schema is passed through as
+    # is, rather than being re-validated against the known schema types.
+    return compact_frame(
+        CurationWorkflow.apply(
+            data_frame,
+            CurationWorkflowSchema.construct(component_schemas=[component_schema]),
+            n_processes,
+        )
+    )
+
+
+class CurationGraph:
+    """Applies curation workflows to a common initial data frame.
+
+    The workflows are treated as a DAG (or more precisely a prefix tree) of
+    components, whereby each node is the frame produced by applying a component
+    to the frame of its parent. Workflows which start with identical components
+    share the same nodes, and so each shared prefix is only computed once.
+
+    The frame of every node is stored in the (on-disk) stage cache, which is how
+    nodes are shared between curations, including those run in other processes.
+    Each node is computed while holding a lock on its cache entry, so that when
+    concurrent curations reach the same uncomputed node, only one computes it and
+    the others load its output from the cache.
+    """
+
+    def __init__(
+        self,
+        data_frame: pandas.DataFrame,
+        n_processes: int,
+        cache: StageCache,
+        profiler: Optional[CurationProfiler] = None,
+    ):
+        """
+        Parameters
+        ----------
+        data_frame
+            The initial data frame to apply the workflows to.
+        n_processes
+            The number of processes that each component may use.
+        cache
+            The cache of previously computed component outputs.
+        profiler
+            An optional profiler to record the cost of applying each component.
+        """
+
+        data_frame = compact_frame(data_frame)
+        self._root_key = frame_hash(data_frame)
+
+        self._n_processes = n_processes
+        self._cache = cache
+        self._profiler = profiler
+
+        # Store the initial frame in the cache so that any process which the graph
+        # is passed to can load it there, rather than it being pickled.
+        if not self._cache.contains(self._root_key):
+            self._cache.store(self._root_key, data_frame)
+
+        self._cache.pin(self._root_key)
+        self._root_frame: Optional[pandas.DataFrame] = data_frame
+
+    def __getstate__(self):
+        return {**self.__dict__, "_root_frame": None}
+
+    def _load_root(self) -> pandas.DataFrame:
+        """Returns the initial frame, loading it from the cache if the graph has
+        been passed to a different process."""
+
+        if self._root_frame is None:
+
+            self._root_frame = self._cache.load(self._root_key)
+
+            if self._root_frame is None:
+
+                raise RuntimeError(
+                    "The initial data frame could not be loaded from the stage cache."
+                )
+
+        return self._root_frame
+
+    def with_n_processes(self, n_processes: int) -> "CurationGraph":
+        """Returns a copy of this graph whose components may use a different
+        number of processes."""
+
+        curation_graph = copy.copy(self)
+        curation_graph._n_processes = n_processes
+
+        return curation_graph
+
+    def _path(
+        self, schema: CurationWorkflowSchema
+    ) -> List[Tuple[str, CurationComponentSchema]]:
+        """Returns the keys of the nodes which a workflow passes through, along
+        with the component which produces each node."""
+
+        path = []
+        parent_key = self._root_key
+
+        for component_schema in schema.component_schemas:
+
+            key = self._cache.stage_key(parent_key, component_schema)
+
+            path.append((key, component_schema))
+            parent_key = key
+
+        return path
+
+    def _load(self, key: str) -> Optional[pandas.DataFrame]:
+        """Attempts to load the frame of a node from the cache."""
+        return None if not self._cache.contains(key) else self._cache.load(key)
+
+    def _apply_component(
+        self,
+        key: str,
+        component_schema: CurationComponentSchema,
+        data_frame: pandas.DataFrame,
+    ) -> pandas.DataFrame:
+        """Applies a single component to a frame, recording its profile if a
+        profiler was provided."""
+
+        apply_function = functools.partial(
+            apply_component, data_frame, component_schema, self._n_processes
+        )
+
+        if self._profiler is None:
+            return apply_function()
+
+        return self._profiler.profile(
+            key, component_schema, data_frame, self._n_processes, apply_function
+        )
+
+    def _evaluate(
+        self, path: List[Tuple[str, CurationComponentSchema]]
+    ) -> pandas.DataFrame:
+        """Computes the frame at the end of a path through the graph, resuming
+        from the deepest node which has already been computed."""
+
+        keys = [self._root_key, *(key for key, _ in path)]
+
+        n_computed, data_frame = 0, None
+
+        for index in range(len(keys) - 1, 0, -1):
+
+            computed_frame = self._load(keys[index])
+
+            if computed_frame is None:
+                continue
+
+            n_computed, data_frame = index, computed_frame
+            break
+
+        if data_frame is None:
+            data_frame = self._load_root()
+
+        for key, component_schema in path[n_computed:]:
+
+            # A curation running concurrently in another process may be computing
+            # the same node, in which case its output is waited for and loaded
+            # rather than the node being computed a second time.
+            with self._cache.lock(key):
+
+                computed_frame = self._load(key)
+
+                if computed_frame is None:
+
+                    computed_frame = self._apply_component(
+                        key, component_schema, data_frame
+                    )
+                    self._cache.store(key, computed_frame)
+
+            data_frame = computed_frame
+
+        return data_frame
+
+    def _validate(
+        self,
+        data_frame: pandas.DataFrame,
+        schema: CurationWorkflowSchema,
+        sort: bool = False,
+    ):
+        """Checks that a curated frame is identical to the one produced by applying
+        a workflow directly to the initial frame, without compacting the frames or
+        caching the output of any components.
+
+        Parameters
+        ----------
+        data_frame
+            The frame curated using the graph.
+        schema
+            The schema of the workflow to apply directly.
+        sort
+            Whether to sort both frames by the id of each data point before they
+            are compared, for when the graph may curate the data in a different
+            order.
+        """
+
+        expected_data_frame = CurationWorkflow.apply(
+            expand_frame(self._load_root()), schema, self._n_processes
+        )
+        data_frame = expand_frame(data_frame)
+
+        if sort:
+
+            data_frame = data_frame.sort_values("Id", kind="stable")
+            expected_data_frame = expected_data_frame.sort_values("Id", kind="stable")
+
+        try:
+            pandas.testing.assert_frame_equal(
+                data_frame.reset_index(drop=True),
+                expected_data_frame.reset_index(drop=True),
+                check_dtype=False,
+            )
+        except AssertionError as error:
+
+            raise RuntimeError(
+                "The frame curated using the curation graph does not match the "
+                "one curated by applying the workflow directly."
+            ) from error
+
+    def apply(
+        self, schema: CurationWorkflowSchema, validate: bool = False
+    ) -> pandas.DataFrame:
+        """Applies a curation workflow to the initial data frame.
+
+        Parameters
+        ----------
+        schema
+            The schema of the workflow to apply.
+        validate
+            Whether to check that the curated frame is identical to the one
+            produced by applying the workflow directly to the initial frame, without
+            compacting the frames or caching the output of any components.
+
+        Returns
+        -------
+            The curated data frame.
+        """
+
+        data_frame = self._evaluate(self._path(schema))
+
+        if validate:
+            self._validate(data_frame, schema)
+
+        return data_frame
+
+    @staticmethod
+    def _per_substance_schema(
+        prefix_schema: CurationWorkflowSchema,
+        substances: Sequence[Tuple[str, ...]],
+        suffix_schema: CurationWorkflowSchema,
+    ) -> CurationWorkflowSchema:
+        """Returns the schema of the workflow which is equivalent to applying a
+        prefix and suffix workflow to a hand selected list of substances."""
+
+        # ``construct`` is used so that the component schemas are passed through as
+        # is, rather than being re-validated against the known schema types.
+        return CurationWorkflowSchema.construct(
+            component_schemas=[
+                *prefix_schema.component_schemas,
+                FilterBySubstancesSchema(substances_to_include=[*substances]),
+                *suffix_schema.component_schemas,
+            ]
+        )
+
+    def apply_per_substance(
+        self,
+        prefix_schema: CurationWorkflowSchema,
+        substances: Sequence[Tuple[str, ...]],
+        suffix_schema: CurationWorkflowSchema,
+        validate: bool = False,
+    ) -> pandas.DataFrame:
+        """Applies a curation workflow which retains only the data measured for
+        a hand selected list of substances, storing the output of the workflow
+        for each substance separately.
+
+        This is equivalent to applying the prefix workflow, then retaining only
+        the data points measured for the substances, and then applying the suffix
+        workflow, provided that each of the suffix components treats the data of
+        each substance independently. When the list of substances changes, only
+        those substances which were not curated previously are passed through the
+        suffix workflow, and the outputs of the others are loaded from the cache.
+
+        Parameters
+        ----------
+        prefix_schema
+            The schema of the workflow to apply before selecting the substances.
+        substances
+            The SMILES patterns of the components of each substance to retain.
+        suffix_schema
+            The schema of the workflow to apply to the data of each substance.
+        validate
+            Whether to check that the curated frame contains the same data as the
+            one produced by directly applying the prefix workflow, the built-in
+            ``FilterBySubstances`` component and then the suffix workflow to the
+            initial frame, without compacting the frames or caching the output of
+            any components.
+
+        Returns
+        -------
+            The curated data frame, with the data of each substance in the order
+            that the substances were provided in.
+        """
+
+        prefix_path = self._path(prefix_schema)
+        prefix_key = self._root_key if len(prefix_path) == 0 else prefix_path[-1][0]
+
+        suffix_hash = schema_hash(suffix_schema.json())
+
+        substance_keys = {
+            substance: schema_hash(prefix_key, json.dumps(substance), suffix_hash)
+            for substance in map(substance_key, substances)
+        }
+
+        if len(substance_keys) == 0:
+
+            data_frame = self._evaluate(prefix_path).iloc[:0]
+
+            if validate:
+                self._validate(
+                    data_frame,
+                    self._per_substance_schema(prefix_schema, [], suffix_schema),
+                )
+
+            return data_frame
+
+        data_frames = {
+            substance: self._cache.load(key) if self._cache.contains(key) else None
+            for substance, key in substance_keys.items()
+        }
+        missing_substances = [
+            substance
+            for substance, data_frame in data_frames.items()
+            if data_frame is None
+        ]
+
+        if len(missing_substances) > 0:
+
+            prefix_frame = self._evaluate(prefix_path)
+
+            # Curate all of the missing substances at once, before splitting the
+            # output back out into the frames of the individual substances.
+            data_frame = prefix_frame[substance_mask(prefix_frame, missing_substances)]
+
+            for component_schema in suffix_schema.component_schemas:
+
+                data_frame = self._apply_component(
+                    self._cache.stage_key(suffix_hash, component_schema),
+                    component_schema,
+                    data_frame,
+                )
+
+            for substance in missing_substances:
+
+                data_frames[substance] = data_frame[
+                    substance_mask(data_frame, [substance])
+                ]
+                self._cache.store(substance_keys[substance], data_frames[substance])
+
+        data_frame = compact_frame(
+            pandas.concat(
+                [data_frames[substance] for substance in substance_keys],
+                ignore_index=True,
+                sort=False,
+            )
+        )
+
+        if validate:
+
+            # The data of each substance is concatenated in the order the substances
+            # were provided, rather than in the order of the initial frame.
+            self._validate(
+                data_frame,
+                self._per_substance_schema(prefix_schema, substances, suffix_schema),
+                sort=True,
+            )
+
+        return data_frame
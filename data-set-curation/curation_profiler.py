@@ -0,0 +1,279 @@
+"""Utilities for profiling the individual components of curation workflows, so that
+it is clear which component is to blame when a curation is slow."""
+import glob
+import json
+import os
+import resource
+import shutil
+import threading
+import time
+from multiprocessing import Pool
+from typing import Callable, Iterable, Iterator, List, TypeVar
+
+import pandas
+from compact_frames import intern_substances
+from openff.evaluator.datasets.curation.components.components import (
+    CurationComponentSchema,
+)
+
+PROFILE_COLUMNS = [
+    "Component",
+    "Key",
+    "Process",
+    "N Processes",
+    "Wall Time (s)",
+    "CPU Time (s)",
+    "Peak Memory Delta (MB)",
+    "Rows In",
+    "Rows Out",
+    "Substances In",
+    "Substances Out",
+    "Utilization",
+]
+
+
+T = TypeVar("T")
+S = TypeVar("S")
+
+
+def parallel_map(
+    function: Callable[[T], S],
+    arguments: Iterable[T],
+    n_processes: int,
+    chunk_size: int = 1,
+) -> Iterator[S]:
+    """Lazily maps a function over a set of arguments using a pool of worker
+    processes, or in this process if only one process may be used.
+
+    The pool is closed (and its workers waited on) once all of the results have
+    been consumed, such that the CPU time of its workers is attributed to whichever
+    component is being profiled in this process.
+
+    Parameters
+    ----------
+    function
+        The (picklable) function to apply.
+    arguments
+        The arguments to apply the function to.
+    n_processes
+        The number of worker processes to use.
+    chunk_size
+        The number of arguments to send to a worker at once.
+
+    Returns
+    -------
+        The results of applying the function, in the order of the arguments.
+    """
+
+    arguments = [*arguments]
+
+    if n_processes <= 1 or len(arguments) <= 1:
+
+        yield from map(function, arguments)
+        return
+
+    with Pool(n_processes) as pool:
+
+        yield from pool.imap(function, arguments, chunk_size)
+
+
+def _cpu_time() -> float:
+    """Returns the CPU time used by this process, and by any of its child processes
+    which have exited, such as the workers of the process pools used by both the
+    built-in components and ``parallel_map``."""
+
+    return sum(
+        usage.ru_utime + usage.ru_stime
+        for usage in map(
+            resource.getrusage, [resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN]
+        )
+    )
+
+
+def _resident_memory() -> float:
+    """Returns the current resident memory (MB) of this process."""
+
+    with open("/proc/self/statm") as file:
+        n_pages = int(file.read().split()[1])
+
+    return n_pages * os.sysconf("SC_PAGE_SIZE") / 1024.0**2
+
+
+class _MemorySampler:
+    """Periodically samples the resident memory of this process on a background
+    thread, so that the peak memory used while applying a single component can be
+    measured.
+
+    The ``ru_maxrss`` reported by ``getrusage`` is not used, as it is the peak over
+    the lifetime of the process, and so does not change unless a component exceeds
+    the peak of all of the components applied before it.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        """
+        Parameters
+        ----------
+        interval
+            The time (s) between each sample.
+        """
+
+        self.interval = interval
+
+        self.initial_memory = _resident_memory()
+        self.peak_memory = self.initial_memory
+
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+
+        while not self._stopped.wait(self.interval):
+            self.peak_memory = max(self.peak_memory, _resident_memory())
+
+    def __enter__(self) -> "_MemorySampler":
+
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+
+        self._stopped.set()
+        self._thread.join()
+
+        self.peak_memory = max(self.peak_memory, _resident_memory())
+
+
+class CurationProfiler:
+    """Records how long each curation component takes to apply, how much CPU time
+    and memory it uses, and how many data rows and substances go in and out.
+
+    The CPU time includes that of any worker processes which the component starts
+    and which exit before it returns. The peak memory is that of this process
+    only, sampled while the component is applied, relative to its memory before
+    the component was applied.
+
+    Each process appends its records to its own file in the profiler directory,
+    such that curations which are run in separate processes are all captured.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Parameters
+        ----------
+        directory
+            The directory to store the profile records in.
+        """
+        self.directory = directory
+
+    def reset(self):
+        """Removes any previously stored records."""
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def profile(
+        self,
+        key: str,
+        component_schema: CurationComponentSchema,
+        data_frame: pandas.DataFrame,
+        n_processes: int,
+        apply_function: Callable[[], pandas.DataFrame],
+    ) -> pandas.DataFrame:
+        """Applies a curation component while recording its profile.
+
+        Parameters
+        ----------
+        key
+            The key which identifies the output of the component.
+        component_schema
+            The schema of the component being applied.
+        data_frame
+            The frame the component is being applied to.
+        n_processes
+            The number of processes the component may use.
+        apply_function
+            A function which applies the component and returns its output.
+
+        Returns
+        -------
+            The output of the component.
+        """
+
+        with _MemorySampler() as memory_sampler:
+
+            initial_cpu_time = _cpu_time()
+            initial_wall_time = time.perf_counter()
+
+            output_frame = apply_function()
+
+            wall_time = time.perf_counter() - initial_wall_time
+            cpu_time = _cpu_time() - initial_cpu_time
+
+        record = {
+            "Component": component_schema.type,
+            "Key": key,
+            "Process": os.getpid(),
+            "N Processes": n_processes,
+            "Wall Time (s)": wall_time,
+            "CPU Time (s)": cpu_time,
+            "Peak Memory Delta (MB)": (
+                memory_sampler.peak_memory - memory_sampler.initial_memory
+            ),
+            "Rows In": len(data_frame),
+            "Rows Out": len(output_frame),
+            "Substances In": len(intern_substances(data_frame).substances),
+            "Substances Out": len(intern_substances(output_frame).substances),
+            "Utilization": cpu_time / max(wall_time * n_processes, 1.0e-9),
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        with open(os.path.join(self.directory, f"{os.getpid()}.jsonl"), "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+        return output_frame
+
+    def records(self) -> pandas.DataFrame:
+        """Returns all of the records stored by any process."""
+
+        records: List[dict] = []
+
+        for file_path in sorted(glob.glob(os.path.join(self.directory, "*.jsonl"))):
+
+            with open(file_path) as file:
+                records.extend(json.loads(line) for line in file if line.strip())
+
+        return pandas.DataFrame(records, columns=PROFILE_COLUMNS)
+
+    def report(self, json_path: str, csv_path: str) -> str:
+        """Saves a report of all of the stored records, and returns a summary table
+        of the total cost of each type of component.
+
+        Parameters
+        ----------
+        json_path
+            The path to save the records to as JSON.
+        csv_path
+            The path to save the records to as CSV.
+        """
+
+        records = self.records()
+
+        records.to_json(json_path, orient="records", indent=2)
+        records.to_csv(csv_path, index=False)
+
+        summary = records.groupby("Component").agg(
+            **{
+                "Calls": ("Key", "count"),
+                "Wall Time (s)": ("Wall Time (s)", "sum"),
+                "CPU Time (s)": ("CPU Time (s)", "sum"),
+                "Max Memory Delta (MB)": ("Peak Memory Delta (MB)", "max"),
+                "Rows In": ("Rows In", "sum"),
+                "Rows Out": ("Rows Out", "sum"),
+                "Mean Utilization": ("Utilization", "mean"),
+            }
+        )
+
+        return summary.sort_values("Wall Time (s)", ascending=False).to_string(
+            float_format="{:.2f}".format
+        )
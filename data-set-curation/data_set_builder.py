@@ -0,0 +1,191 @@
+"""A fast path for building ``nonbonded`` data sets from curated data frames.
+
+``DataSet.from_pandas`` builds and validates a ``DataSetEntry`` (and a
+``Component`` for each of its components) for every row of a frame in turn.
+The frames produced by the curation workflows have however already been
+validated, and so here the entries are instead built column-wise from native
+Python values, with the models created using ``construct`` to skip re-validating
+each field.
+"""
+import re
+from typing import List, NamedTuple
+
+import numpy
+import pandas
+from nonbonded.library.models.authors import Author
+from nonbonded.library.models.datasets import Component, DataSet, DataSetEntry
+
+_VALUE_COLUMN = re.compile(r"(.+) Value \((.+)\)")
+
+
+class CuratedDataSet(NamedTuple):
+    """A curated data set alongside the data frame it was built from."""
+
+    data_set: DataSet
+    """The curated data set."""
+    data_frame: pandas.DataFrame
+    """The curated data frame which the data set was built from."""
+
+
+def _column_values(data_frame: pandas.DataFrame, column: str, default) -> List:
+    """Returns the values of a column as native Python objects, with any missing
+    values (or a missing column) replaced by a default."""
+
+    if column not in data_frame:
+        return [default] * len(data_frame)
+
+    values = data_frame[column].values.astype(object)
+    values[pandas.isnull(values)] = default
+
+    return [
+        value.item() if isinstance(value, numpy.generic) else value
+        for value in values
+    ]
+
+
+def data_set_from_pandas(
+    data_frame: pandas.DataFrame,
+    identifier: str,
+    description: str,
+    authors: List[Author],
+    validate: bool = False,
+) -> DataSet:
+    """Builds a data set from a curated data frame, producing an identical data
+    set to ``DataSet.from_pandas`` without re-validating each entry.
+
+    Parameters
+    ----------
+    data_frame
+        The curated data frame.
+    identifier
+        The unique id of the data set.
+    description
+        The description of the data set.
+    authors
+        The authors of the data set.
+    validate
+        Whether to check that the data set serializes identically to one built
+        using ``DataSet.from_pandas``.
+    """
+
+    property_types = numpy.full(len(data_frame), None, dtype=object)
+    values = numpy.full(len(data_frame), numpy.nan)
+    std_errors = numpy.full(len(data_frame), numpy.nan)
+
+    for column in data_frame:
+
+        match = _VALUE_COLUMN.fullmatch(column)
+
+        if match is None:
+            continue
+
+        is_property = data_frame[column].notna().values
+
+        if (is_property & ~pandas.isnull(property_types)).any():
+
+            raise ValueError(
+                "Each data row must contain a value for exactly one property type."
+            )
+
+        property_types[is_property] = match.group(1)
+        values[is_property] = data_frame[column].values[is_property]
+
+        uncertainty_column = f"{match.group(1)} Uncertainty ({match.group(2)})"
+
+        if uncertainty_column in data_frame:
+            std_errors[is_property] = data_frame[uncertainty_column].values[
+                is_property
+            ]
+
+    if pandas.isnull(property_types).any():
+
+        raise ValueError(
+            "Each data row must contain a value for exactly one property type."
+        )
+
+    n_components = data_frame["N Components"].values.astype(int)
+
+    # Coerce the roles to the type expected by the model, as would happen during
+    # validation.
+    role_field = Component.__fields__["role"]
+
+    component_values = [
+        (
+            _column_values(data_frame, f"Component {index + 1}", None),
+            _column_values(data_frame, f"Mole Fraction {index + 1}", 0.0),
+            _column_values(data_frame, f"Exact Amount {index + 1}", 0),
+            _column_values(data_frame, f"Role {index + 1}", role_field.default),
+        )
+        for index in range(n_components.max(initial=0))
+    ]
+
+    entries = []
+
+    for row, (
+        property_type,
+        temperature,
+        pressure,
+        phase,
+        value,
+        std_error,
+        doi,
+        row_n_components,
+    ) in enumerate(
+        zip(
+            property_types.tolist(),
+            _column_values(data_frame, "Temperature (K)", None),
+            _column_values(data_frame, "Pressure (kPa)", None),
+            _column_values(data_frame, "Phase", None),
+            values.tolist(),
+            std_errors.tolist(),
+            _column_values(data_frame, "Source", None),
+            n_components.tolist(),
+        )
+    ):
+
+        components = [
+            Component.construct(
+                smiles=smiles[row],
+                mole_fraction=mole_fractions[row],
+                exact_amount=int(exact_amounts[row]),
+                role=role_field.type_(roles[row]),
+            )
+            for smiles, mole_fractions, exact_amounts, roles in component_values[
+                :row_n_components
+            ]
+        ]
+
+        entries.append(
+            DataSetEntry.construct(
+                property_type=property_type,
+                temperature=temperature,
+                pressure=pressure,
+                phase=phase,
+                value=value,
+                std_error=None if numpy.isnan(std_error) else std_error,
+                doi=doi,
+                components=components,
+            )
+        )
+
+    data_set = DataSet.construct(
+        id=identifier, description=description, authors=authors, entries=entries
+    )
+
+    if validate:
+
+        expected_data_set = DataSet.from_pandas(
+            data_frame=data_frame,
+            identifier=identifier,
+            description=description,
+            authors=authors,
+        )
+
+        if data_set.json() != expected_data_set.json():
+
+            raise RuntimeError(
+                f"The {identifier} data set built using the fast path does not match "
+                f"the one built using `DataSet.from_pandas`."
+            )
+
+    return data_set
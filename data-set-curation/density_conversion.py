@@ -0,0 +1,235 @@
+"""A vectorized engine for inter-converting binary mass density and excess molar
+volume data, using the pure component densities measured at the same state.
+
+The pure densities are collected into a hashed index keyed by the component and
+the (rounded) temperature and pressure they were measured at, such that the pure
+densities of every binary data row can be looked up, and every conversion
+computed, in a single vectorized pass.
+"""
+import numpy
+import pandas
+from compact_frames import intern_substances
+from state_selection import property_column
+
+DENSITY_COLUMN = "Density Value (g / ml)"
+EXCESS_MOLAR_VOLUME_COLUMN = "ExcessMolarVolume Value (cm ** 3 / mol)"
+
+# The columns which define the substance and state that a data point was measured
+# for, and which are shared by a converted data point and its source.
+_STATE_COLUMNS = [
+    "Temperature (K)",
+    "Pressure (kPa)",
+    "Phase",
+    "N Components",
+    "Component 1",
+    "Role 1",
+    "Mole Fraction 1",
+    "Exact Amount 1",
+    "Component 2",
+    "Role 2",
+    "Mole Fraction 2",
+    "Exact Amount 2",
+]
+
+
+def _pure_density_index(
+    data_frame: pandas.DataFrame, temperature_precision: int, pressure_precision: int
+) -> pandas.DataFrame:
+    """Builds an index of the pure densities in a data frame, keyed by component and
+    by the temperature and pressure rounded to the specified number of decimal
+    places. Where multiple densities share a key, the one with the smallest
+    uncertainty (and then the one which appears first) is retained.
+    """
+
+    is_pure_density = (data_frame["N Components"] == 1) & data_frame[
+        DENSITY_COLUMN
+    ].notna()
+
+    pure_data = data_frame[is_pure_density]
+
+    uncertainty_column = property_column(data_frame, "Density", "Uncertainty")
+    uncertainties = (
+        numpy.full(len(pure_data), numpy.inf)
+        if uncertainty_column is None
+        else pure_data[uncertainty_column].astype(float).fillna(numpy.inf).values
+    )
+
+    pure_index = pandas.DataFrame(
+        {
+            "Component": pure_data["Component 1"].astype(object).values,
+            "Temperature": pure_data["Temperature (K)"]
+            .values.astype(float)
+            .round(temperature_precision),
+            "Pressure": pure_data["Pressure (kPa)"]
+            .values.astype(float)
+            .round(pressure_precision),
+            "Density": pure_data[DENSITY_COLUMN].values.astype(float),
+            "Source": pure_data["Source"].astype(object).values,
+            "Uncertainty": uncertainties,
+            "Order": numpy.arange(len(pure_data)),
+        }
+    )
+
+    return (
+        pure_index.sort_values(["Uncertainty", "Order"], kind="stable")
+        .drop_duplicates(["Component", "Temperature", "Pressure"])
+        .set_index(["Component", "Temperature", "Pressure"])[["Density", "Source"]]
+    )
+
+
+def convert_excess_density_data(
+    data_frame: pandas.DataFrame,
+    molecular_weights: pandas.Series,
+    temperature_precision: int,
+    pressure_precision: int,
+) -> pandas.DataFrame:
+    """Converts binary densities into excess molar volumes, and excess molar
+    volumes into binary densities, where the densities of both pure components
+    were measured at the same state.
+
+    With :math:`M_i` the molecular weights, :math:`x_i` the mole fractions,
+    :math:`\\rho_i` the pure densities and :math:`\\rho` the density of the
+    mixture, the excess molar volume is
+
+    .. math::
+
+        V^{ex} = \\sum_i x_i M_i / \\rho - \\sum_i x_i M_i / \\rho_i
+
+    Parameters
+    ----------
+    data_frame
+        The data frame containing the data to convert.
+    molecular_weights
+        The molecular weight (g / mol) of each component, indexed by SMILES.
+    temperature_precision
+        The number of decimal places to compare temperatures (K) to.
+    pressure_precision
+        The number of decimal places to compare pressures (kPa) to.
+
+    Returns
+    -------
+        The converted data points, whose sources are the sources of the binary
+        data point and of both pure densities joined by ' + '.
+
+    Notes
+    -----
+    The converted data points (in both directions) are given no uncertainty, as
+    they are by the built-in ``ConvertExcessDensityData`` component. An
+    uncertainty could only be propagated where the binary data point and both
+    pure densities report one, and giving only some converted data points an
+    uncertainty would change which of a set of duplicates is retained, as the
+    duplicate filters choose between duplicates by their uncertainty.
+    """
+
+    has_density = DENSITY_COLUMN in data_frame
+    has_excess_molar_volume = EXCESS_MOLAR_VOLUME_COLUMN in data_frame
+
+    if not has_density or len(data_frame) == 0:
+        return data_frame.iloc[:0]
+
+    pure_index = _pure_density_index(
+        data_frame, temperature_precision, pressure_precision
+    )
+
+    is_binary = (data_frame["N Components"] == 2).values
+
+    densities = data_frame[DENSITY_COLUMN].values.astype(float)
+    excess_molar_volumes = (
+        data_frame[EXCESS_MOLAR_VOLUME_COLUMN].values.astype(float)
+        if has_excess_molar_volume
+        else numpy.full(len(data_frame), numpy.nan)
+    )
+
+    rows = numpy.flatnonzero(
+        is_binary & (~numpy.isnan(densities) | ~numpy.isnan(excess_molar_volumes))
+    )
+
+    if len(rows) == 0 or len(pure_index) == 0:
+        return data_frame.iloc[:0]
+
+    binary_data = data_frame.iloc[rows]
+
+    temperatures = (
+        binary_data["Temperature (K)"].values.astype(float).round(temperature_precision)
+    )
+    pressures = (
+        binary_data["Pressure (kPa)"].values.astype(float).round(pressure_precision)
+    )
+
+    interned = intern_substances(binary_data, 2)
+    component_weights = molecular_weights.reindex(interned.components).values
+
+    # Missing components have an id of -1, and so map onto the trailing entries.
+    components = numpy.array([*interned.components, None], dtype=object)
+
+    weights, pure_densities, pure_sources = [], [], []
+
+    for index in range(2):
+
+        component_ids = interned.component_ids[:, index]
+
+        weights.append(numpy.append(component_weights, numpy.nan)[component_ids])
+
+        # Look up the pure densities of every binary row at once.
+        pure_data = pure_index.reindex(
+            pandas.MultiIndex.from_arrays(
+                [components[component_ids], temperatures, pressures]
+            )
+        )
+
+        pure_densities.append(pure_data["Density"].values.astype(float))
+        pure_sources.append(pure_data["Source"].values)
+
+    mole_fractions = [
+        binary_data[f"Mole Fraction {index + 1}"].values.astype(float)
+        for index in range(2)
+    ]
+
+    mixture_weight = sum(x * m for x, m in zip(mole_fractions, weights))
+    ideal_volume = sum(
+        x * m / rho for x, m, rho in zip(mole_fractions, weights, pure_densities)
+    )
+
+    binary_densities = densities[rows]
+    binary_excess_molar_volumes = excess_molar_volumes[rows]
+
+    converted_frames = []
+
+    for target_column, converted_values in [
+        (EXCESS_MOLAR_VOLUME_COLUMN, mixture_weight / binary_densities - ideal_volume),
+        (DENSITY_COLUMN, mixture_weight / (binary_excess_molar_volumes + ideal_volume)),
+    ]:
+
+        is_converted = numpy.isfinite(converted_values)
+
+        if not is_converted.any():
+            continue
+
+        converted_data = binary_data.iloc[numpy.flatnonzero(is_converted)][
+            [column for column in _STATE_COLUMNS if column in binary_data]
+        ].copy()
+
+        converted_data.insert(
+            0,
+            "Id",
+            [
+                f"{identifier}-converted"
+                for identifier in binary_data["Id"].values[is_converted]
+            ],
+        )
+        converted_data[target_column] = converted_values[is_converted]
+        converted_data["Source"] = [
+            " + ".join(sources)
+            for sources in zip(
+                binary_data["Source"].astype(str).values[is_converted],
+                pure_sources[0][is_converted],
+                pure_sources[1][is_converted],
+            )
+        ]
+
+        converted_frames.append(converted_data)
+
+    if len(converted_frames) == 0:
+        return data_frame.iloc[:0]
+
+    return pandas.concat(converted_frames, ignore_index=True, sort=False)
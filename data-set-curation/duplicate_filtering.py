@@ -0,0 +1,228 @@
+"""A hash based engine for finding the duplicate data points in a curation frame.
+
+Rather than comparing data points pairwise, each data point is assigned a
+canonical key built from its property type, phase, its temperature and pressure
+rounded to the comparison precision, and its components (alongside their roles,
+exact amounts and rounded mole fractions) sorted into a canonical order, such that
+a binary system listed in either component order has the same key. Data points
+are only ever compared with the others in the same bucket, and so the cost scales
+roughly linearly with the number of data points.
+"""
+import re
+from typing import Optional
+
+import numpy
+import pandas
+from compact_frames import group_ids, intern_substances
+
+_VALUE_COLUMN = re.compile(r"(.+) Value \((.+)\)")
+
+
+def _property_ids(data_frame: pandas.DataFrame) -> numpy.ndarray:
+    """Returns the index of the value column which is populated for each data row,
+    or -1 for rows which do not contain a value."""
+
+    property_ids = numpy.full(len(data_frame), -1)
+
+    for index, column in enumerate(
+        column for column in data_frame if _VALUE_COLUMN.fullmatch(column)
+    ):
+        property_ids[(property_ids < 0) & data_frame[column].notna().values] = index
+
+    return property_ids
+
+
+def duplicate_keys(
+    data_frame: pandas.DataFrame,
+    temperature_precision: int,
+    pressure_precision: int,
+    mole_fraction_precision: int,
+) -> numpy.ndarray:
+    """Returns an integer key for each data row, such that two rows have the same
+    key only if they are duplicates of each other.
+
+    Parameters
+    ----------
+    data_frame
+        The data frame to key.
+    temperature_precision
+        The number of decimal places to compare temperatures (K) to.
+    pressure_precision
+        The number of decimal places to compare pressures (kPa) to.
+    mole_fraction_precision
+        The number of decimal places to compare mole fractions to.
+    """
+
+    interned = intern_substances(data_frame)
+    n_columns = interned.component_ids.shape[1]
+
+    def column_values(
+        column: str, precision: Optional[int] = None, numeric: bool = True
+    ) -> numpy.ndarray:
+
+        if column not in data_frame:
+            return numpy.full(len(data_frame), numpy.nan)
+
+        if not numeric:
+            return data_frame[column].astype(object).values
+
+        values = data_frame[column].values.astype(float)
+        return values if precision is None else values.round(precision)
+
+    # Key each (component, role, mole fraction, exact amount) tuple such that the
+    # components of each row can be sorted into a canonical order.
+    component_keys = group_ids(
+        interned.component_ids.T.ravel(),
+        *(
+            numpy.concatenate(
+                [
+                    column_values(f"{name} {index + 1}", precision, numeric)
+                    for index in range(n_columns)
+                ]
+            )
+            for name, precision, numeric in [
+                ("Role", None, False),
+                ("Mole Fraction", mole_fraction_precision, True),
+                ("Exact Amount", None, True),
+            ]
+        ),
+    )
+    component_keys = numpy.sort(
+        component_keys.reshape(n_columns, len(data_frame)).T, axis=1
+    )
+
+    return group_ids(
+        _property_ids(data_frame),
+        column_values("Phase", numeric=False),
+        column_values("Temperature (K)", temperature_precision),
+        column_values("Pressure (kPa)", pressure_precision),
+        *component_keys.T,
+    )
+
+
+def duplicate_mask(
+    data_frame: pandas.DataFrame,
+    temperature_precision: int,
+    pressure_precision: int,
+    mole_fraction_precision: int,
+) -> numpy.ndarray:
+    """Returns a mask of the data rows to retain after removing any duplicates.
+
+    The data point which is retained of each set of duplicates is chosen in
+    exactly the same way as by the built-in ``FilterDuplicates`` component: the
+    data points measured for each number of components and property type are
+    sorted by their uncertainty in the same way as ``pandas`` sorts them (with
+    any missing uncertainties placed last in their original order), and the last
+    data point of each set of duplicates in that order is retained.
+
+    Parameters
+    ----------
+    data_frame
+        The data frame to find the duplicates in.
+    temperature_precision
+        The number of decimal places to compare temperatures (K) to.
+    pressure_precision
+        The number of decimal places to compare pressures (kPa) to.
+    mole_fraction_precision
+        The number of decimal places to compare mole fractions to.
+    """
+
+    mask = numpy.zeros(len(data_frame), dtype=bool)
+
+    if len(data_frame) == 0:
+        return mask
+
+    keys = duplicate_keys(
+        data_frame, temperature_precision, pressure_precision, mole_fraction_precision
+    )
+
+    n_components = data_frame["N Components"].values
+
+    for n_component in numpy.unique(n_components):
+
+        for column in data_frame:
+
+            match = _VALUE_COLUMN.fullmatch(column)
+
+            if match is None:
+                continue
+
+            rows = numpy.flatnonzero(
+                (n_components == n_component) & data_frame[column].notna().values
+            )
+
+            if len(rows) == 0:
+                continue
+
+            uncertainty_column = f"{match.group(1)} Uncertainty ({match.group(2)})"
+
+            if uncertainty_column in data_frame:
+
+                uncertainties = data_frame[uncertainty_column].values[rows].astype(float)
+                is_missing = numpy.isnan(uncertainties)
+
+                rows = numpy.concatenate(
+                    [
+                        rows[~is_missing][
+                            uncertainties[~is_missing].argsort(kind="quicksort")
+                        ],
+                        rows[is_missing],
+                    ]
+                )
+
+            # Keep the last data point of each set of duplicates.
+            _, last_indices = numpy.unique(keys[rows][::-1], return_index=True)
+            mask[rows[::-1][last_indices]] = True
+
+    return mask
+
+
+def filter_duplicates(
+    data_frame: pandas.DataFrame,
+    temperature_precision: int,
+    pressure_precision: int,
+    mole_fraction_precision: int,
+) -> pandas.DataFrame:
+    """Removes the duplicate data points from a data frame (see
+    ``duplicate_mask``). As in the built-in ``FilterDuplicates`` component, the
+    temperatures, pressures and mole fractions of the retained data points are
+    rounded to the precision they were compared at.
+
+    Parameters
+    ----------
+    data_frame
+        The data frame to remove the duplicates from.
+    temperature_precision
+        The number of decimal places to compare temperatures (K) to.
+    pressure_precision
+        The number of decimal places to compare pressures (kPa) to.
+    mole_fraction_precision
+        The number of decimal places to compare mole fractions to.
+    """
+
+    data_frame = data_frame[
+        duplicate_mask(
+            data_frame,
+            temperature_precision,
+            pressure_precision,
+            mole_fraction_precision,
+        )
+    ]
+
+    precisions = {
+        "Temperature (K)": temperature_precision,
+        "Pressure (kPa)": pressure_precision,
+        **{
+            column: mole_fraction_precision
+            for column in data_frame
+            if re.fullmatch(r"Mole Fraction \d+", column)
+        },
+    }
+
+    return data_frame.assign(
+        **{
+            column: data_frame[column].astype(float).round(precision)
+            for column, precision in precisions.items()
+            if column in data_frame
+        }
+    )
@@ -0,0 +1,33 @@
+"""An inter-process lock used to serialize updates to the persistent tables (such
+as the substance feature table) which are shared by concurrently running
+curations, so that the entries added by one process are never lost when another
+process saves the table."""
+import contextlib
+import fcntl
+import os
+
+
+@contextlib.contextmanager
+def file_lock(path: str, blocking: bool = True):
+    """Holds an exclusive lock on the file ``<path>.lock`` for the duration of
+    the context.
+
+    Parameters
+    ----------
+    path
+        The path to the file being guarded by the lock.
+    blocking
+        Whether to wait for the lock to be released if it is held elsewhere,
+        rather than raising a ``BlockingIOError``.
+    """
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    with open(f"{path}.lock", "w") as file:
+
+        fcntl.flock(file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
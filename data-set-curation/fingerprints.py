@@ -0,0 +1,198 @@
+"""A persistent table of the molecular fingerprints of each of the unique
+components which appear in the curated data, from which compact pairwise
+similarity matrices can be cheaply computed."""
+import functools
+import os
+from typing import Iterable, List, Optional, Tuple
+
+import numpy
+from curation_profiler import parallel_map
+from file_lock import file_lock
+from molecule_cache import PERCEPTION_VERSION, CachedMolecule, molecule_cache
+
+# The built-in ``SelectSubstances`` component measures the distance between
+# components using MACCS keys, and so the same fingerprints are stored here.
+FINGERPRINTS_PATH = os.path.join(
+    "curation-cache", f"fingerprints-maccs166-{PERCEPTION_VERSION}.npz"
+)
+
+
+def _compute_fingerprint(smiles: str, cached_molecule: CachedMolecule) -> numpy.ndarray:
+    """Computes the (bit packed) OpenEye MACCS fingerprint of a component."""
+
+    from openeye import oechem, oegraphsim
+
+    if cached_molecule.molecule is not None:
+        oe_molecule = cached_molecule.molecule.to_openeye()
+    else:
+        oe_molecule = oechem.OEMol()
+        oechem.OESmilesToMol(oe_molecule, smiles)
+
+    fingerprint = oegraphsim.OEFingerPrint()
+    oegraphsim.OEMakeFP(fingerprint, oe_molecule, oegraphsim.OEFPType_MACCS166)
+
+    bits = numpy.array(
+        [fingerprint.IsBitOn(bit) for bit in range(fingerprint.GetSize())], dtype=bool
+    )
+
+    return numpy.packbits(bits)
+
+
+def _compute_fingerprint_star(arguments: Tuple[str, CachedMolecule]) -> numpy.ndarray:
+    return _compute_fingerprint(*arguments)
+
+
+class FingerprintTable:
+    """A table of bit packed fingerprints, indexed by component SMILES, which is
+    persisted to disk and extended as new components are encountered. The table
+    is re-read and extended under a file lock, such that concurrent processes
+    never overwrite each other's fingerprints."""
+
+    def __init__(self, path: str = FINGERPRINTS_PATH):
+        """
+        Parameters
+        ----------
+        path
+            The path to persist the table to.
+        """
+
+        self.path = path
+
+        self._smiles: Optional[List[str]] = None
+        self._fingerprints: Optional[numpy.ndarray] = None
+
+    def _load(self, reload: bool = False):
+
+        if self._smiles is not None and not reload:
+            return
+
+        self._smiles, self._fingerprints = [], None
+
+        if not os.path.isfile(self.path):
+            return
+
+        with numpy.load(self.path) as stored_table:
+
+            self._smiles = [*stored_table["smiles"]]
+            self._fingerprints = stored_table["fingerprints"]
+
+    def _save(self):
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        temporary_path = f"{self.path}.{os.getpid()}.tmp.npz"
+        numpy.savez(
+            temporary_path,
+            smiles=numpy.array(self._smiles),
+            fingerprints=self._fingerprints,
+        )
+        os.replace(temporary_path, self.path)
+
+    def fingerprints(
+        self, smiles: Iterable[str], n_processes: int = 1
+    ) -> numpy.ndarray:
+        """Returns the bit packed fingerprints of a set of components, computing
+        any which have not been computed previously.
+
+        Parameters
+        ----------
+        smiles
+            The SMILES patterns of the components.
+        n_processes
+            The number of processes to parse any new components using.
+
+        Returns
+        -------
+            An array of the fingerprints with shape=(n_smiles, n_bytes) and
+            dtype=uint8, in the order the SMILES were provided.
+        """
+
+        smiles = [*smiles]
+        self._load()
+
+        if not {*smiles} <= {*self._smiles}:
+            self._extend(smiles, n_processes)
+
+        indices = {pattern: index for index, pattern in enumerate(self._smiles)}
+
+        return self._fingerprints[[indices[pattern] for pattern in smiles]]
+
+    def _extend(self, smiles: List[str], n_processes: int):
+        """Computes and stores the fingerprints of any components which are not
+        yet in the table."""
+
+        with file_lock(self.path):
+
+            # Pick up any fingerprints stored by other processes since the table
+            # was last loaded.
+            self._load(reload=True)
+
+            missing_smiles = sorted({*smiles} - {*self._smiles})
+
+            if len(missing_smiles) == 0:
+                return
+
+            cached_molecules = molecule_cache().molecules(missing_smiles, n_processes)
+            arguments = [
+                (pattern, cached_molecules[pattern]) for pattern in missing_smiles
+            ]
+
+            missing_fingerprints = numpy.stack(
+                [*parallel_map(_compute_fingerprint_star, arguments, n_processes)]
+            )
+
+            self._smiles.extend(missing_smiles)
+            self._fingerprints = (
+                missing_fingerprints
+                if self._fingerprints is None
+                else numpy.concatenate([self._fingerprints, missing_fingerprints])
+            )
+
+            self._save()
+
+    def similarity_matrix(
+        self, smiles: Iterable[str], n_processes: int = 1
+    ) -> Tuple[List[str], numpy.ndarray]:
+        """Computes the pairwise Tanimoto similarity between a set of components.
+
+        The fingerprints are unpacked once, such that the number of bits which each
+        pair of fingerprints have in common is given by a single matrix product.
+
+        Parameters
+        ----------
+        smiles
+            The SMILES patterns of the components.
+        n_processes
+            The number of processes to compute any new fingerprints using.
+
+        Returns
+        -------
+            The SMILES patterns in the order they appear in the matrix, and the
+            symmetric similarity matrix. The similarities are computed in double
+            precision, as by the OpenEye toolkit, so that sums of the distances
+            between components are identical to those computed from the toolkit.
+        """
+
+        smiles = sorted({*smiles})
+
+        # The bit counts are small integers, and so are represented exactly.
+        fingerprints = self.fingerprints(smiles, n_processes)
+        bits = numpy.unpackbits(fingerprints, axis=1).astype(numpy.float64)
+
+        n_bits = bits.sum(axis=1)
+
+        n_common = bits @ bits.T
+        n_union = n_bits[:, None] + n_bits[None, :] - n_common
+
+        similarity = numpy.where(
+            n_union > 0, n_common / numpy.maximum(n_union, 1.0), 1.0
+        )
+
+        return smiles, similarity
+
+
+@functools.lru_cache()
+def fingerprint_table() -> FingerprintTable:
+    """Returns the fingerprint table shared by all of the curation components run
+    in this process."""
+    return FingerprintTable()
@@ -0,0 +1,253 @@
+"""A persistent cache of the toolkit molecules parsed from the SMILES patterns
+which appear in the curated data, so that each unique component is only parsed
+once rather than once per data row per curation component."""
+import functools
+import hashlib
+import os
+import pickle
+import shutil
+import sqlite3
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from curation_profiler import parallel_map
+from openff.evaluator import __version__ as evaluator_version
+from openff.toolkit import __version__ as toolkit_version
+from openff.toolkit.topology import Molecule
+from openff.toolkit.utils import UndefinedStereochemistryError
+
+
+def _perception_version() -> str:
+    """Returns a tag which identifies the versions of the toolkits used to parse
+    molecules and to perceive their features (the OpenFF toolkit, its OpenEye and
+    RDKit backends, and checkmol along with the ``openff-evaluator`` wrapper of
+    it), and which so changes whenever any of them are upgraded."""
+
+    versions = [toolkit_version, evaluator_version]
+
+    try:
+        from openeye import oechem
+
+        versions.append(f"openeye-{oechem.OEToolkitsGetRelease()}")
+    except ImportError:
+        pass
+
+    try:
+        import rdkit
+
+        versions.append(f"rdkit-{rdkit.__version__}")
+    except ImportError:
+        pass
+
+    checkmol_path = shutil.which("checkmol")
+
+    if checkmol_path is not None:
+
+        with open(checkmol_path, "rb") as file:
+            versions.append(f"checkmol-{hashlib.sha256(file.read()).hexdigest()}")
+
+    return hashlib.sha256(" ".join(versions).encode()).hexdigest()[:16]
+
+
+# The molecules and the persistent tables of their features are only valid for
+# the versions of the toolkits which created them (the molecules are also stored
+# pickled), and so each is stored under a path keyed by these versions.
+PERCEPTION_VERSION = _perception_version()
+
+MOLECULE_CACHE_PATH = os.path.join(
+    "curation-cache", f"molecules-{PERCEPTION_VERSION}.sqlite"
+)
+
+
+class CachedMolecule(NamedTuple):
+    """A molecule stored in the molecule cache."""
+
+    canonical_smiles: Optional[str]
+    """The canonical SMILES representation of the molecule, or ``None`` if the
+    SMILES pattern could not be parsed."""
+    molecule: Optional[Molecule]
+    """The parsed molecule, or ``None`` if the SMILES pattern could not be
+    parsed."""
+    undefined_stereochemistry: bool
+    """Whether the SMILES pattern has any undefined stereocenters."""
+
+
+def _parse_smiles(smiles: str) -> CachedMolecule:
+    """Parses a SMILES pattern into a toolkit molecule."""
+
+    try:
+        molecule = Molecule.from_smiles(smiles, allow_undefined_stereo=True)
+    except Exception:
+        return CachedMolecule(None, None, False)
+
+    try:
+        Molecule.from_smiles(smiles)
+        undefined_stereochemistry = False
+    except UndefinedStereochemistryError:
+        undefined_stereochemistry = True
+
+    return CachedMolecule(molecule.to_smiles(), molecule, undefined_stereochemistry)
+
+
+class MoleculeCache:
+    """A process safe cache of toolkit molecules, keyed by canonical SMILES, which
+    is persisted to disk between runs.
+
+    Both the molecules and the mapping between each of the (possibly different)
+    SMILES patterns of a molecule and its canonical SMILES are stored in a SQLite
+    database. Molecules are additionally memoized in memory once loaded.
+    """
+
+    def __init__(self, path: str = MOLECULE_CACHE_PATH):
+        """
+        Parameters
+        ----------
+        path
+            The path to the SQLite database to store the molecules in.
+        """
+
+        self.path = path
+
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+
+        self._molecules: Dict[str, CachedMolecule] = {}
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def _connect(self) -> sqlite3.Connection:
+        """Returns a connection to the database, re-connecting if the cache has
+        been passed to a different process."""
+
+        if self._connection is not None and self._connection_pid == os.getpid():
+            return self._connection
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        connection = sqlite3.connect(self.path, timeout=60.0)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS aliases "
+            "(smiles TEXT PRIMARY KEY, canonical_smiles TEXT)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS molecules "
+            "(canonical_smiles TEXT PRIMARY KEY, molecule BLOB, "
+            "undefined_stereochemistry INTEGER)"
+        )
+        connection.commit()
+
+        self._connection = connection
+        self._connection_pid = os.getpid()
+
+        return connection
+
+    def _load(self, smiles: Iterable[str]) -> Dict[str, CachedMolecule]:
+        """Loads any of the requested molecules which are stored in the database."""
+
+        connection = self._connect()
+        molecules = {}
+
+        for pattern in smiles:
+
+            row = connection.execute(
+                "SELECT aliases.canonical_smiles, molecules.molecule, "
+                "molecules.undefined_stereochemistry FROM aliases "
+                "LEFT JOIN molecules "
+                "ON aliases.canonical_smiles = molecules.canonical_smiles "
+                "WHERE aliases.smiles = ?",
+                (pattern,),
+            ).fetchone()
+
+            if row is None:
+                continue
+
+            canonical_smiles, molecule_blob, undefined_stereochemistry = row
+
+            molecules[pattern] = CachedMolecule(
+                canonical_smiles,
+                None if molecule_blob is None else pickle.loads(molecule_blob),
+                bool(undefined_stereochemistry),
+            )
+
+        return molecules
+
+    def _store(self, molecules: Dict[str, CachedMolecule]):
+        """Stores a set of newly parsed molecules in the database."""
+
+        connection = self._connect()
+
+        with connection:
+
+            for smiles, cached_molecule in molecules.items():
+
+                connection.execute(
+                    "INSERT OR IGNORE INTO aliases VALUES (?, ?)",
+                    (smiles, cached_molecule.canonical_smiles),
+                )
+
+                if cached_molecule.canonical_smiles is None:
+                    continue
+
+                connection.execute(
+                    "INSERT OR IGNORE INTO molecules VALUES (?, ?, ?)",
+                    (
+                        cached_molecule.canonical_smiles,
+                        pickle.dumps(cached_molecule.molecule),
+                        int(cached_molecule.undefined_stereochemistry),
+                    ),
+                )
+
+    def molecules(
+        self, smiles: Iterable[str], n_processes: int = 1
+    ) -> Dict[str, CachedMolecule]:
+        """Returns the molecules represented by a set of SMILES patterns, parsing
+        any which have not yet been cached.
+
+        Parameters
+        ----------
+        smiles
+            The SMILES patterns of the molecules to return.
+        n_processes
+            The number of processes to parse any uncached molecules using.
+
+        Returns
+        -------
+            The cached molecules keyed by the SMILES pattern they were requested
+            with.
+        """
+
+        smiles = {*smiles}
+
+        missing_smiles = smiles - {*self._molecules}
+        self._molecules.update(self._load(missing_smiles))
+
+        missing_smiles = sorted(smiles - {*self._molecules})
+
+        if len(missing_smiles) > 0:
+
+            parsed_molecules = [
+                *parallel_map(_parse_smiles, missing_smiles, n_processes)
+            ]
+
+            parsed_molecules = dict(zip(missing_smiles, parsed_molecules))
+
+            self._store(parsed_molecules)
+            self._molecules.update(parsed_molecules)
+
+        return {pattern: self._molecules[pattern] for pattern in smiles}
+
+    def molecule(self, smiles: str) -> CachedMolecule:
+        """Returns the molecule represented by a SMILES pattern."""
+        return self.molecules([smiles])[smiles]
+
+
+@functools.lru_cache()
+def molecule_cache() -> MoleculeCache:
+    """Returns the molecule cache shared by all of the curation components run
+    in this process."""
+    return MoleculeCache()
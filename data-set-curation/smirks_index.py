@@ -0,0 +1,204 @@
+"""An index of which SMIRKS patterns match each of the unique components which
+appear in the curated data, so that expensive substructure searches are only ever
+performed once per component and pattern."""
+import functools
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas
+from curation_profiler import parallel_map
+from file_lock import file_lock
+from molecule_cache import PERCEPTION_VERSION, CachedMolecule, molecule_cache
+
+SMIRKS_INDEX_PATH = os.path.join(
+    "curation-cache", f"smirks-index-{PERCEPTION_VERSION}.json"
+)
+
+
+def _match_patterns(arguments: Tuple[CachedMolecule, List[str]]) -> int:
+    """Returns the bitset of the patterns which match a molecule."""
+
+    cached_molecule, patterns = arguments
+
+    if cached_molecule.molecule is None:
+        return 0
+
+    bitset = 0
+
+    for bit, pattern in enumerate(patterns):
+
+        if len(cached_molecule.molecule.chemical_environment_matches(pattern)) == 0:
+            continue
+
+        bitset |= 1 << bit
+
+    return bitset
+
+
+class SmirksIndex:
+    """An index which maps each unique component onto a bitset of the patterns in
+    a registry of SMIRKS patterns which it matches.
+
+    The index is persisted to disk, and is extended incrementally whenever new
+    patterns are registered (which are matched against only the indexed
+    components) or new components are indexed (which are matched against only the
+    registered patterns). Bit ``i`` of a bitset corresponds to the ``i``'th
+    registered pattern.
+
+    The index is re-read and extended under a file lock, such that concurrent
+    processes never overwrite each other's patterns or components.
+    """
+
+    def __init__(self, path: str = SMIRKS_INDEX_PATH):
+        """
+        Parameters
+        ----------
+        path
+            The path to persist the index to.
+        """
+
+        self.path = path
+
+        self._patterns: Optional[List[str]] = None
+        self._bitsets: Optional[Dict[str, int]] = None
+
+    def _load(self, reload: bool = False):
+
+        if self._patterns is not None and not reload:
+            return
+
+        self._patterns, self._bitsets = [], {}
+
+        if not os.path.isfile(self.path):
+            return
+
+        with open(self.path) as file:
+            stored_index = json.load(file)
+
+        self._patterns = stored_index["patterns"]
+        self._bitsets = stored_index["bitsets"]
+
+    def _save(self):
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+
+        with open(temporary_path, "w") as file:
+            json.dump({"patterns": self._patterns, "bitsets": self._bitsets}, file)
+
+        os.replace(temporary_path, self.path)
+
+    def _match(
+        self, smiles: List[str], patterns: List[str], n_processes: int
+    ) -> List[int]:
+        """Matches a set of patterns against a set of components."""
+
+        cached_molecules = molecule_cache().molecules(smiles, n_processes)
+        arguments = [(cached_molecules[component], patterns) for component in smiles]
+
+        return [*parallel_map(_match_patterns, arguments, n_processes)]
+
+    def register(self, patterns: Iterable[str], n_processes: int = 1):
+        """Adds SMIRKS patterns to the registry, matching any new patterns against
+        all of the already indexed components."""
+
+        self._load()
+
+        patterns = [*dict.fromkeys(patterns)]
+
+        if all(pattern in self._patterns for pattern in patterns):
+            return
+
+        with file_lock(self.path):
+
+            # Pick up any changes made by other processes since the index was
+            # last loaded.
+            self._load(reload=True)
+
+            new_patterns = [
+                pattern for pattern in patterns if pattern not in self._patterns
+            ]
+
+            if len(new_patterns) == 0:
+                return
+
+            indexed_smiles = [*self._bitsets]
+            new_bitsets = self._match(indexed_smiles, new_patterns, n_processes)
+
+            for smiles, new_bitset in zip(indexed_smiles, new_bitsets):
+                self._bitsets[smiles] |= new_bitset << len(self._patterns)
+
+            self._patterns.extend(new_patterns)
+            self._save()
+
+    def index(self, smiles: Iterable[str], n_processes: int = 1):
+        """Adds components to the index, matching any new components against all
+        of the registered patterns."""
+
+        self._load()
+
+        smiles = {*smiles}
+
+        if smiles <= {*self._bitsets}:
+            return
+
+        with file_lock(self.path):
+
+            # Pick up any changes made by other processes since the index was
+            # last loaded.
+            self._load(reload=True)
+
+            new_smiles = sorted(smiles - {*self._bitsets})
+
+            if len(new_smiles) == 0:
+                return
+
+            new_bitsets = self._match(new_smiles, self._patterns, n_processes)
+
+            self._bitsets.update(zip(new_smiles, new_bitsets))
+            self._save()
+
+    def pattern_mask(self, patterns: Iterable[str]) -> int:
+        """Returns the bitset which selects a set of registered patterns."""
+
+        self._load()
+
+        mask = 0
+
+        for pattern in patterns:
+            mask |= 1 << self._patterns.index(pattern)
+
+        return mask
+
+    def matches_any(
+        self, smiles: Iterable[str], patterns: List[str], n_processes: int = 1
+    ) -> pandas.Series:
+        """Returns whether each of a set of components matches at least one of a
+        set of patterns, registering and indexing them as needed.
+
+        Returns
+        -------
+            A boolean series indexed by component SMILES.
+        """
+
+        smiles = sorted({*smiles})
+
+        self.register(patterns, n_processes)
+        self.index(smiles, n_processes)
+
+        mask = self.pattern_mask(patterns)
+
+        return pandas.Series(
+            [self._bitsets[component] & mask != 0 for component in smiles],
+            index=smiles,
+            dtype=bool,
+        )
+
+
+@functools.lru_cache()
+def smirks_index() -> SmirksIndex:
+    """Returns the SMIRKS index shared by all of the curation components run in
+    this process."""
+    return SmirksIndex()
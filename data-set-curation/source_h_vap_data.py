@@ -1,12 +1,22 @@
 """This script collates all of the hand sourced enthalpy of vaporization data."""
+import functools
+import os
+
 import pandas
+from compact_frames import compact_frame
+from curation_cache import load_frame, save_frame, schema_hash
+from nonbonded import __version__ as nonbonded_version
 from nonbonded.library.models.datasets import Component, DataSetEntry
+from openff.evaluator import __version__ as evaluator_version
 from openff.evaluator import substances
+from openff.toolkit import __version__ as toolkit_version
 
+SOURCE_H_VAP_DATA_PATH = os.path.join("curation-cache", "source-h-vap-data.feather")
 
-def source_enthalpy_of_vaporization() -> pandas.DataFrame:
-    """Returns a list of hand sourced enthalpy of vaporization data
-    entries"""
+
+def _build_enthalpy_of_vaporization() -> pandas.DataFrame:
+    """Builds the frame of hand sourced enthalpy of vaporization data entries,
+    normalizing the SMILES pattern of each component."""
 
     data_entries = [
         # Formic Acid
@@ -727,3 +737,40 @@ def source_enthalpy_of_vaporization() -> pandas.DataFrame:
     data_frame = pandas.DataFrame(data_rows)
 
     return data_frame
+
+
+@functools.lru_cache()
+def source_data_hash() -> str:
+    """Returns a hash of the hand sourced data, which changes whenever this file
+    (or the version of the packages used to build and normalize the data entries)
+    does."""
+
+    with open(__file__) as file:
+        return schema_hash(
+            file.read(), evaluator_version, nonbonded_version, toolkit_version
+        )
+
+
+@functools.lru_cache()
+def _cached_enthalpy_of_vaporization() -> pandas.DataFrame:
+    """Loads the frame of hand sourced data from the cache, building and caching
+    it first if this file (or the version of the packages used to build and
+    normalize the data entries) has changed since it was last built."""
+
+    source_hash = source_data_hash()
+    data_frame = load_frame(SOURCE_H_VAP_DATA_PATH, source_hash)
+
+    if data_frame is None:
+
+        data_frame = compact_frame(_build_enthalpy_of_vaporization())
+
+        os.makedirs(os.path.dirname(SOURCE_H_VAP_DATA_PATH), exist_ok=True)
+        save_frame(data_frame, SOURCE_H_VAP_DATA_PATH, source_hash)
+
+    return data_frame
+
+
+def source_enthalpy_of_vaporization() -> pandas.DataFrame:
+    """Returns a frame of hand sourced enthalpy of vaporization data
+    entries"""
+    return _cached_enthalpy_of_vaporization().copy()
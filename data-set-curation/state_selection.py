@@ -0,0 +1,298 @@
+"""A vectorized engine for selecting the data points measured closest to a set of
+target states, which processes all substances in a single batched pass rather
+than looping over each substance in turn.
+
+The selection reproduces that of the built-in ``SelectDataPoints`` component
+exactly, including the way in which it breaks ties, such that the two may be used
+interchangeably.
+"""
+from typing import List, Optional
+
+import numpy
+import pandas
+from compact_frames import intern_substances
+from openff.evaluator.datasets.curation.components.selection import State, TargetState
+
+
+def property_column(
+    data_frame: pandas.DataFrame, property_type: str, kind: str = "Value"
+) -> Optional[str]:
+    """Returns the column which stores the values (or uncertainties) of a given
+    property type, or ``None`` if the data frame contains no such column."""
+
+    prefix = f"{property_type} {kind} ("
+
+    return next(
+        (column for column in data_frame.columns if column.startswith(prefix)), None
+    )
+
+
+def _distances_to_state(
+    temperatures: numpy.ndarray,
+    pressures: numpy.ndarray,
+    mole_fractions: numpy.ndarray,
+    state: State,
+) -> numpy.ndarray:
+    """Returns the squared distance between a number of states and a target state,
+    computed in the same way as the built-in ``SelectDataPoints`` component."""
+
+    distances = (temperatures - state.temperature) ** 2 + (
+        pressures / 10.0 - state.pressure / 10.0
+    ) ** 2
+
+    for index, mole_fraction in enumerate(state.mole_fractions):
+        distances += (mole_fractions[:, index] - mole_fraction) ** 2
+
+    return distances
+
+
+def _sorted_group_ids(*arrays: numpy.ndarray) -> numpy.ndarray:
+    """Returns an integer id for each unique combination of values found across a
+    set of equal length arrays, where the ids are assigned in lexicographic order
+    of the combinations."""
+
+    order = numpy.lexsort(arrays[::-1])
+
+    is_new = numpy.ones(len(order), dtype=bool)
+    is_new[1:] = numpy.any(
+        [array[order][1:] != array[order][:-1] for array in arrays], axis=0
+    )
+
+    ids = numpy.empty(len(order), dtype=int)
+    ids[order] = numpy.cumsum(is_new) - 1
+
+    return ids
+
+
+def _close_states(
+    substances: numpy.ndarray, coordinates: numpy.ndarray
+) -> pandas.DataFrame:
+    """Finds every pair of states of the same substance whose coordinates are all
+    close according to ``numpy.isclose``, as this is how the built-in component
+    matches data points to a selected state.
+
+    Parameters
+    ----------
+    substances
+        The substance of each state, where the states are sorted by substance and
+        then by their first coordinate.
+    coordinates
+        The coordinates of each state with shape=(n_states, n_coordinates).
+
+    Returns
+    -------
+        A data frame with a "Chosen" and "Neighbour" column, where the coordinates
+        of each neighbour are close to those of the chosen state. Each state is its
+        own neighbour.
+    """
+
+    n_states = len(substances)
+    indices = numpy.arange(n_states)
+
+    chosen, neighbours = [indices], [indices]
+
+    # As the states are sorted, once no pair of states ``offset`` apart shares a
+    # substance and a close first coordinate, no pair further apart can either.
+    for offset in range(1, n_states):
+
+        lower, upper = indices[:-offset], indices[offset:]
+
+        is_candidate = (substances[lower] == substances[upper]) & (
+            numpy.isclose(coordinates[upper, 0], coordinates[lower, 0])
+            | numpy.isclose(coordinates[lower, 0], coordinates[upper, 0])
+        )
+
+        if not is_candidate.any():
+            break
+
+        lower, upper = lower[is_candidate], upper[is_candidate]
+
+        # ``numpy.isclose`` is not symmetric, and so each direction is checked.
+        for reference, other in [(lower, upper), (upper, lower)]:
+
+            is_close = numpy.isclose(coordinates[other], coordinates[reference]).all(
+                axis=1
+            )
+
+            chosen.append(reference[is_close])
+            neighbours.append(other[is_close])
+
+    return pandas.DataFrame(
+        {
+            "Chosen": numpy.concatenate(chosen),
+            "Neighbour": numpy.concatenate(neighbours),
+        }
+    )
+
+
+def _select_target_state(
+    data_frame: pandas.DataFrame, target_state: TargetState
+) -> numpy.ndarray:
+    """Selects the data points closest to one set of target states.
+
+    As in the built-in ``SelectDataPoints`` component, each data point is first
+    assigned to the cluster of the target state it is closest to. For each
+    substance and cluster, the states at which data was measured are then ranked
+    by the number of different property types measured at them (and then by their
+    distance to the target state, and then by the state itself), and each property
+    type is selected at the highest ranked state which has data for it. Every data
+    point of that property type which was measured at a state close to the
+    selected one is retained.
+
+    Returns
+    -------
+        The positional indices of the selected data points.
+    """
+
+    property_types = target_state.property_types
+    n_components = {n for _, n in property_types}
+
+    if len(n_components) != 1:
+
+        raise ValueError(
+            "The property types of a target state must all be measured for the "
+            "same number of components."
+        )
+
+    n_components = n_components.pop()
+
+    # Label each data row by the index of the property type it was measured for,
+    # or -1 if not measured for any of them. As in the built-in component, later
+    # property types take precedence.
+    labels = numpy.full(len(data_frame), -1)
+
+    for label, (property_type, _) in enumerate(property_types):
+
+        value_column = property_column(data_frame, property_type)
+
+        if value_column is not None:
+            labels[data_frame[value_column].notna().values] = label
+
+    coordinates = numpy.column_stack(
+        [
+            data_frame["Temperature (K)"].values.astype(float),
+            data_frame["Pressure (kPa)"].values.astype(float),
+            *(
+                data_frame[f"Mole Fraction {index + 1}"].values.astype(float)
+                for index in range(n_components)
+            ),
+        ]
+    )
+
+    # Data points with a missing coordinate are never grouped into a state, and so
+    # can never be selected.
+    rows = numpy.flatnonzero(
+        (data_frame["N Components"].values == n_components)
+        & numpy.isfinite(coordinates).all(axis=1)
+    )
+
+    if len(rows) == 0:
+        return rows
+
+    labels, coordinates = labels[rows], coordinates[rows]
+
+    # Sort the components of each substance, and hence the mole fractions, into the
+    # order that the built-in component re-orders them into.
+    interned = intern_substances(data_frame.iloc[rows], n_components)
+
+    component_order = numpy.argsort(interned.component_ids, axis=1, kind="stable")
+    coordinates[:, 2:] = numpy.take_along_axis(
+        coordinates[:, 2:], component_order, axis=1
+    )
+
+    distances = numpy.column_stack(
+        [
+            _distances_to_state(
+                coordinates[:, 0], coordinates[:, 1], coordinates[:, 2:], state
+            )
+            for state in target_state.states
+        ]
+    )
+    clusters = distances.argmin(axis=1)
+
+    substances = interned.substance_ids
+
+    # Group the data points into states, which are ordered by substance and then by
+    # their coordinates, as the built-in component groups them.
+    states = _sorted_group_ids(substances, *coordinates.T, clusters)
+    n_states = states.max() + 1
+
+    first_rows = numpy.zeros(n_states, dtype=int)
+    first_rows[states[::-1]] = numpy.arange(len(rows))[::-1]
+
+    state_substances = substances[first_rows]
+    state_clusters = clusters[first_rows]
+    state_distances = distances[first_rows, state_clusters]
+
+    # Rank the states of each substance and cluster by the number of different
+    # property types (including those not targeted) measured at them, and then by
+    # their distance to the target state.
+    state_labels = (
+        pandas.DataFrame({"State": states, "Label": labels})
+        .drop_duplicates()
+        .reset_index(drop=True)
+    )
+    n_labels = numpy.bincount(state_labels["State"].values, minlength=n_states)
+
+    ranks = numpy.empty(n_states, dtype=int)
+    ranks[numpy.lexsort((numpy.arange(n_states), state_distances, -n_labels))] = (
+        numpy.arange(n_states)
+    )
+
+    # Each targeted property type is selected at the highest ranked state of each
+    # substance and cluster which has data for it close to that state.
+    close_states = _close_states(state_substances, coordinates[first_rows])
+
+    candidates = close_states.merge(
+        state_labels[state_labels["Label"] >= 0].rename(
+            columns={"State": "Neighbour"}
+        ),
+        on="Neighbour",
+    )
+    candidates["Group"] = (
+        state_substances[candidates["Chosen"].values] * len(target_state.states)
+        + state_clusters[candidates["Chosen"].values]
+    )
+    candidates["Rank"] = ranks[candidates["Chosen"].values]
+
+    best_candidates = candidates.sort_values("Rank", kind="stable").drop_duplicates(
+        ["Group", "Label"]
+    )
+    selected = candidates.merge(
+        best_candidates[["Group", "Label", "Chosen"]],
+        on=["Group", "Label", "Chosen"],
+    )
+
+    is_selected = pandas.MultiIndex.from_arrays([states, labels]).isin(
+        pandas.MultiIndex.from_arrays([selected["Neighbour"], selected["Label"]])
+    )
+
+    return rows[is_selected]
+
+
+def select_data_points(
+    data_frame: pandas.DataFrame, target_states: List[TargetState]
+) -> pandas.DataFrame:
+    """Selects the data points closest to a number of sets of target states.
+
+    Parameters
+    ----------
+    data_frame
+        The data frame to select data points from.
+    target_states
+        The sets of target states to select data points at.
+
+    Returns
+    -------
+        The selected data points, in their original order.
+    """
+
+    selected_rows = [
+        _select_target_state(data_frame, target_state)
+        for target_state in target_states
+    ]
+
+    if len(selected_rows) == 0:
+        return data_frame.iloc[:0]
+
+    return data_frame.iloc[numpy.unique(numpy.concatenate(selected_rows))]
@@ -0,0 +1,202 @@
+"""A table of the chemical features of each unique component which appears in the
+curated data, which allows the chemistry based filters to be applied to data rows
+as vectorized joins rather than by inspecting each row in turn."""
+import functools
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy
+import pandas
+from curation_profiler import parallel_map
+from file_lock import file_lock
+from molecule_cache import PERCEPTION_VERSION, CachedMolecule, molecule_cache
+from openff.evaluator.utils.checkmol import (
+    ChemicalEnvironment,
+    analyse_functional_groups,
+)
+from simtk import unit
+
+SUBSTANCE_FEATURES_PATH = os.path.join(
+    "curation-cache", f"substance-features-{PERCEPTION_VERSION}.feather"
+)
+
+
+def environment_column(environment: ChemicalEnvironment) -> str:
+    """Returns the feature table column which records whether a component contains
+    a particular chemical environment."""
+    return f"Environment {ChemicalEnvironment(environment).value}"
+
+
+FEATURE_COLUMNS = [
+    "Parsed",
+    "Elements",
+    "Charged Atoms",
+    "Molecular Weight",
+    "Undefined Stereochemistry",
+    "Ionic Liquid",
+    "Environments Analysed",
+    *(environment_column(environment) for environment in ChemicalEnvironment),
+]
+
+
+def _formal_charge(atom) -> float:
+    """Returns the formal charge (e) of an atom, which older versions of the
+    toolkit store as an int rather than as a quantity."""
+
+    if isinstance(atom.formal_charge, int):
+        return float(atom.formal_charge)
+
+    return atom.formal_charge.value_in_unit(unit.elementary_charge)
+
+
+def _compute_features(smiles: str, cached_molecule: CachedMolecule) -> Dict[str, Any]:
+    """Computes the features of a single component."""
+
+    molecule = cached_molecule.molecule
+    environments = analyse_functional_groups(smiles)
+
+    return {
+        "Parsed": molecule is not None,
+        "Elements": ""
+        if molecule is None
+        else ",".join(sorted({atom.element.symbol for atom in molecule.atoms})),
+        # Like the built-in charge filter, flag any molecule with a formally
+        # charged atom, including zwitterions whose net charge is zero.
+        "Charged Atoms": molecule is not None
+        and any(
+            not numpy.isclose(_formal_charge(atom), 0.0) for atom in molecule.atoms
+        ),
+        "Molecular Weight": numpy.nan
+        if molecule is None
+        else sum(
+            atom.element.mass.value_in_unit(unit.dalton) for atom in molecule.atoms
+        ),
+        "Undefined Stereochemistry": cached_molecule.undefined_stereochemistry,
+        "Ionic Liquid": "." in smiles,
+        "Environments Analysed": environments is not None,
+        **{
+            environment_column(environment): environments is not None
+            and environment in environments
+            for environment in ChemicalEnvironment
+        },
+    }
+
+
+def _compute_features_star(arguments: Tuple[str, CachedMolecule]) -> Dict[str, Any]:
+    return _compute_features(*arguments)
+
+
+class SubstanceFeatureTable:
+    """A table of the features of each unique component, namely its elements,
+    whether any of its atoms are formally charged, its molecular weight (g / mol),
+    whether it has undefined stereochemistry, whether it is an ionic liquid and
+    which chemical environments it contains.
+
+    The table is indexed by component SMILES and is persisted to disk, with the
+    features of new components appended as they are encountered. The table is
+    re-read and extended under a file lock, such that concurrent processes never
+    overwrite each other's entries.
+    """
+
+    def __init__(self, path: str = SUBSTANCE_FEATURES_PATH):
+        """
+        Parameters
+        ----------
+        path
+            The path to persist the table to.
+        """
+
+        self.path = path
+        self._table: Optional[pandas.DataFrame] = None
+
+    def _load(self) -> pandas.DataFrame:
+
+        if self._table is not None:
+            return self._table
+
+        table = pandas.DataFrame(columns=FEATURE_COLUMNS)
+        table.index.name = "Smiles"
+
+        if os.path.isfile(self.path):
+
+            stored_table = pandas.read_feather(self.path).set_index("Smiles")
+
+            # Discard tables written with a different set of features.
+            if [*stored_table.columns] == FEATURE_COLUMNS:
+                table = stored_table
+
+        self._table = table
+        return table
+
+    def _save(self):
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        self._table.reset_index().to_feather(temporary_path)
+        os.replace(temporary_path, self.path)
+
+    def features(self, smiles: Iterable[str], n_processes: int = 1) -> pandas.DataFrame:
+        """Returns the features of a set of components, computing any which have
+        not been computed previously.
+
+        Parameters
+        ----------
+        smiles
+            The SMILES patterns of the components.
+        n_processes
+            The number of processes to compute any missing features using.
+
+        Returns
+        -------
+            The features of the components indexed by SMILES.
+        """
+
+        smiles = sorted({*smiles})
+        table = self._load()
+
+        if all(pattern in table.index for pattern in smiles):
+            return table.loc[smiles]
+
+        with file_lock(self.path):
+
+            # Pick up any features stored by other processes since the table was
+            # last loaded.
+            self._table = None
+            table = self._load()
+
+            missing_smiles = [
+                pattern for pattern in smiles if pattern not in table.index
+            ]
+
+            if len(missing_smiles) == 0:
+                return table.loc[smiles]
+
+            cached_molecules = molecule_cache().molecules(missing_smiles, n_processes)
+            arguments = [
+                (pattern, cached_molecules[pattern]) for pattern in missing_smiles
+            ]
+
+            missing_features = [
+                *parallel_map(_compute_features_star, arguments, n_processes)
+            ]
+
+            missing_table = pandas.DataFrame(
+                missing_features, index=pandas.Index(missing_smiles, name="Smiles")
+            )[FEATURE_COLUMNS]
+
+            self._table = table = (
+                missing_table
+                if len(table) == 0
+                else pandas.concat([table, missing_table])
+            )
+            self._save()
+
+        return table.loc[smiles]
+
+
+@functools.lru_cache()
+def substance_feature_table() -> SubstanceFeatureTable:
+    """Returns the feature table shared by all of the curation components run in
+    this process."""
+    return SubstanceFeatureTable()
@@ -0,0 +1,199 @@
+"""An index of the substances which curated data sets were measured for, which
+allows the data rows of a curation frame to be checked against (or excluded
+based on) the substances of other data sets in a single vectorized pass.
+
+Substances are keyed by the sorted SMILES patterns of their components, such that
+the same substance is matched regardless of the order its components are listed
+in.
+"""
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy
+import pandas
+from compact_frames import intern_substances
+from openff.evaluator.utils.checkmol import ChemicalEnvironment
+from substance_features import environment_column, substance_feature_table
+
+SubstanceKey = Tuple[str, ...]
+
+_VALUE_COLUMN = re.compile(r"(.+) Value \(.+\)")
+
+
+def substance_key(smiles: Iterable[str]) -> SubstanceKey:
+    """Returns the canonical key of the substance with a given set of components."""
+    return tuple(sorted(smiles))
+
+
+def _row_substance_keys(
+    data_frame: pandas.DataFrame,
+) -> Tuple[List[SubstanceKey], numpy.ndarray]:
+    """Returns the key of each unique substance in a data frame, and the index
+    into these keys of the substance that each data row was measured for."""
+
+    interned = intern_substances(data_frame)
+
+    # Both the interned components and the component ids of each substance are
+    # sorted, and so the keys are built in their canonical order.
+    substance_keys = [
+        tuple(interned.components[index] for index in substance if index >= 0)
+        for substance in interned.substances
+    ]
+
+    return substance_keys, interned.substance_ids
+
+
+def substance_mask(
+    data_frame: pandas.DataFrame, substances: Iterable[Iterable[str]]
+) -> numpy.ndarray:
+    """Returns a mask of the data rows which were measured for any of a set of
+    substances, independently of the order of the components of either.
+
+    Parameters
+    ----------
+    data_frame
+        The data frame to mask.
+    substances
+        The SMILES patterns of the components of each substance to match.
+    """
+
+    keys = {substance_key(substance) for substance in substances}
+
+    if len(data_frame) == 0 or len(keys) == 0:
+        return numpy.zeros(len(data_frame), dtype=bool)
+
+    substance_keys, substance_ids = _row_substance_keys(data_frame)
+
+    is_member = numpy.array([key in keys for key in substance_keys], dtype=bool)
+    return is_member[substance_ids]
+
+
+class SubstanceIndex:
+    """An index of the substances that a set of curated data frames were measured
+    for, with postings of the substances measured for each property type and
+    containing each chemical environment.
+
+    The index is built once from the curated frames, and only stores the keys of
+    the substances, such that it is cheap to share between curations.
+    """
+
+    def __init__(self, data_frames: Iterable[pandas.DataFrame]):
+        """
+        Parameters
+        ----------
+        data_frames
+            The curated data frames to index the substances of.
+        """
+
+        property_postings: Dict[str, Set[SubstanceKey]] = defaultdict(set)
+
+        for data_frame in data_frames:
+
+            if len(data_frame) == 0:
+                continue
+
+            substance_keys, substance_ids = _row_substance_keys(data_frame)
+
+            for column in data_frame:
+
+                match = _VALUE_COLUMN.fullmatch(column)
+
+                if match is None:
+                    continue
+
+                property_postings[match.group(1)].update(
+                    substance_keys[index]
+                    for index in numpy.unique(
+                        substance_ids[data_frame[column].notna().values]
+                    )
+                )
+
+        self._property_postings = {**property_postings}
+        self._substances: Set[SubstanceKey] = set().union(
+            *self._property_postings.values()
+        )
+
+        self._environment_postings: Dict[ChemicalEnvironment, Set[SubstanceKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self._substances)
+
+    def __contains__(self, substance: Iterable[str]) -> bool:
+        return substance_key(substance) in self._substances
+
+    def property_types(self) -> List[str]:
+        """Returns the property types which any substance was measured for."""
+        return sorted(self._property_postings)
+
+    def _environment_substances(
+        self, environment: ChemicalEnvironment, n_processes: int
+    ) -> Set[SubstanceKey]:
+        """Returns the substances which any of whose components contain a given
+        chemical environment."""
+
+        if environment not in self._environment_postings:
+
+            components = sorted({smiles for key in self._substances for smiles in key})
+
+            features = substance_feature_table().features(components, n_processes)
+            has_environment = features[environment_column(environment)].astype(bool)
+
+            self._environment_postings[environment] = {
+                key
+                for key in self._substances
+                if any(has_environment[smiles] for smiles in key)
+            }
+
+        return self._environment_postings[environment]
+
+    def substances(
+        self,
+        property_type: Optional[str] = None,
+        environment: Optional[ChemicalEnvironment] = None,
+        n_components: Optional[int] = None,
+        n_processes: int = 1,
+    ) -> List[SubstanceKey]:
+        """Returns the keys of the indexed substances which match all of the
+        (optional) filters.
+
+        Parameters
+        ----------
+        property_type
+            The property type that the substances must have been measured for.
+        environment
+            The chemical environment that any component of the substances must
+            contain.
+        n_components
+            The number of components that the substances must have.
+        n_processes
+            The number of processes to use when computing the chemical environments
+            of any components not yet in the substance feature table.
+        """
+
+        substances = (
+            self._substances
+            if property_type is None
+            else self._property_postings.get(property_type, set())
+        )
+
+        if environment is not None:
+            substances = substances & self._environment_substances(
+                environment, n_processes
+            )
+
+        return sorted(
+            key
+            for key in substances
+            if n_components is None or len(key) == n_components
+        )
+
+    def mask(self, data_frame: pandas.DataFrame, **filters) -> numpy.ndarray:
+        """Returns a mask of the data rows which were measured for an indexed
+        substance which matches a set of filters (see ``substances``)."""
+        return substance_mask(data_frame, self.substances(**filters))
+
+    def exclusion_mask(self, data_frame: pandas.DataFrame, **filters) -> numpy.ndarray:
+        """Returns a mask of the data rows which were not measured for an indexed
+        substance which matches a set of filters (see ``substances``)."""
+        return ~self.mask(data_frame, **filters)
@@ -0,0 +1,118 @@
+import numpy
+import pandas
+import pytest
+
+pytest.importorskip("nonbonded")
+
+from data_set_builder import data_set_from_pandas  # noqa: E402
+from nonbonded.library.models.authors import Author  # noqa: E402
+from nonbonded.library.models.datasets import DataSet  # noqa: E402
+
+AUTHORS = [
+    Author(
+        name="Simon Boothroyd",
+        email="simon.boothroyd@colorado.edu",
+        institute="University of Colorado Boulder",
+    )
+]
+
+
+def _data_frame() -> pandas.DataFrame:
+
+    nan = numpy.nan
+
+    return pandas.DataFrame(
+        [
+            # A pure density with and without an uncertainty.
+            {
+                "Id": "0",
+                "N Components": 1,
+                "Component 1": "CO",
+                "Role 1": "Solvent",
+                "Mole Fraction 1": 1.0,
+                "Exact Amount 1": nan,
+                "Density Value (g / ml)": 0.79,
+                "Density Uncertainty (g / ml)": 0.001,
+            },
+            {
+                "Id": "1",
+                "N Components": 1,
+                "Component 1": "CCO",
+                "Role 1": "Solvent",
+                "Mole Fraction 1": 1.0,
+                "Exact Amount 1": nan,
+                "Density Value (g / ml)": 0.78,
+                "Density Uncertainty (g / ml)": nan,
+            },
+            {
+                "Id": "2",
+                "N Components": 2,
+                "Component 1": "CCO",
+                "Role 1": "Solvent",
+                "Mole Fraction 1": 0.25,
+                "Exact Amount 1": nan,
+                "Component 2": "O",
+                "Role 2": "Solvent",
+                "Mole Fraction 2": 0.75,
+                "Exact Amount 2": nan,
+                "EnthalpyOfMixing Value (kJ / mol)": -0.5,
+                "EnthalpyOfMixing Uncertainty (kJ / mol)": 0.01,
+            },
+            # A solvation free energy, whose solute is defined by an exact amount.
+            {
+                "Id": "3",
+                "N Components": 2,
+                "Component 1": "CCCO",
+                "Role 1": "Solute",
+                "Mole Fraction 1": nan,
+                "Exact Amount 1": 1.0,
+                "Component 2": "O",
+                "Role 2": "Solvent",
+                "Mole Fraction 2": 1.0,
+                "Exact Amount 2": nan,
+                "SolvationFreeEnergy Value (kJ / mol)": -20.0,
+                "SolvationFreeEnergy Uncertainty (kJ / mol)": nan,
+            },
+            {
+                "Id": "4",
+                "N Components": 1,
+                "Component 1": "CCCO",
+                "Role 1": "Solvent",
+                "Mole Fraction 1": 1.0,
+                "Exact Amount 1": nan,
+                "EnthalpyOfVaporization Value (kJ / mol)": 47.5,
+                "EnthalpyOfVaporization Uncertainty (kJ / mol)": 0.2,
+            },
+        ]
+    ).assign(
+        **{
+            "Temperature (K)": [298.15, 298.15, 318.15, 298.15, 298.15],
+            "Pressure (kPa)": 101.325,
+            "Phase": ["Liquid", "Liquid", "Liquid", "Liquid", "Liquid + Gas"],
+            "Source": [f"10.1000/{index}" for index in range(5)],
+        }
+    )
+
+
+def test_data_set_from_pandas():
+
+    data_frame = _data_frame()
+
+    data_set = data_set_from_pandas(data_frame, "test-set", "A test set.", AUTHORS)
+    expected_data_set = DataSet.from_pandas(
+        data_frame=data_frame,
+        identifier="test-set",
+        description="A test set.",
+        authors=AUTHORS,
+    )
+
+    assert data_set.json() == expected_data_set.json()
+
+
+def test_multiple_values():
+
+    data_frame = _data_frame()
+    data_frame.loc[0, "EnthalpyOfMixing Value (kJ / mol)"] = 1.0
+
+    with pytest.raises(ValueError, match="exactly one property type"):
+        data_set_from_pandas(data_frame, "test-set", "A test set.", AUTHORS)
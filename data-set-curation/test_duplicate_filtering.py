@@ -0,0 +1,162 @@
+from typing import List, Optional, Tuple
+
+import numpy
+import pandas
+import pytest
+
+pytest.importorskip("openff.evaluator")
+
+from duplicate_filtering import filter_duplicates  # noqa: E402
+from openff.evaluator.datasets.curation.components.filtering import (  # noqa: E402
+    FilterDuplicates,
+    FilterDuplicatesSchema,
+)
+
+DENSITY = "Density"
+ENTHALPY_OF_MIXING = "EnthalpyOfMixing"
+
+UNITS = {DENSITY: "g / ml", ENTHALPY_OF_MIXING: "kJ / mol"}
+
+PRECISIONS = dict(
+    temperature_precision=2, pressure_precision=3, mole_fraction_precision=6
+)
+
+
+def _data_frame(
+    rows: List[Tuple[Tuple[str, ...], Tuple[float, ...], float, str, float, float]],
+    pressure: Optional[List[float]] = None,
+) -> pandas.DataFrame:
+    """Builds a curation frame from (components, mole fractions, temperature,
+    property type, value, uncertainty) tuples."""
+
+    data_rows = []
+
+    for index, row in enumerate(rows):
+
+        components, mole_fractions, temperature, property_type, value, error = row
+        units = UNITS[property_type]
+
+        data_row = {
+            "Id": str(index),
+            "Temperature (K)": temperature,
+            "Pressure (kPa)": 101.325 if pressure is None else pressure[index],
+            "Phase": "Liquid",
+            "N Components": len(components),
+            "Source": f"source-{index}",
+            f"{property_type} Value ({units})": value,
+            f"{property_type} Uncertainty ({units})": error,
+        }
+
+        for component_index, (smiles, mole_fraction) in enumerate(
+            zip(components, mole_fractions)
+        ):
+
+            data_row[f"Component {component_index + 1}"] = smiles
+            data_row[f"Role {component_index + 1}"] = "Solvent"
+            data_row[f"Mole Fraction {component_index + 1}"] = mole_fraction
+            data_row[f"Exact Amount {component_index + 1}"] = numpy.nan
+
+        data_rows.append(data_row)
+
+    data_frame = pandas.DataFrame(data_rows)
+
+    for property_type, units in UNITS.items():
+
+        for column in [
+            f"{property_type} Value ({units})",
+            f"{property_type} Uncertainty ({units})",
+        ]:
+
+            if column not in data_frame:
+                data_frame[column] = numpy.nan
+
+    return data_frame
+
+
+def _retained_data(data_frame: pandas.DataFrame) -> List[tuple]:
+    """Returns the id, rounded state and components of each retained data point,
+    with the components of each in a canonical order."""
+
+    data_rows = []
+
+    for _, data_row in data_frame.iterrows():
+
+        components = sorted(
+            (data_row[f"Component {index + 1}"], data_row[f"Mole Fraction {index + 1}"])
+            for index in range(data_row["N Components"])
+        )
+
+        data_rows.append(
+            (
+                data_row["Id"],
+                data_row["Temperature (K)"],
+                data_row["Pressure (kPa)"],
+                tuple(components),
+            )
+        )
+
+    return sorted(data_rows)
+
+
+def _assert_same_duplicates(data_frame: pandas.DataFrame):
+
+    filtered_data = filter_duplicates(data_frame, **PRECISIONS)
+    expected_data = FilterDuplicates.apply(
+        data_frame, FilterDuplicatesSchema(**PRECISIONS)
+    )
+
+    assert len(expected_data) < len(data_frame)
+    assert _retained_data(filtered_data) == _retained_data(expected_data)
+
+
+def test_missing_uncertainties():
+
+    data_frame = _data_frame(
+        [
+            (("CO",), (1.0,), 298.15, DENSITY, 0.79, 0.01),
+            (("CO",), (1.0,), 298.15, DENSITY, 0.78, 0.001),
+            (("CO",), (1.0,), 298.15, DENSITY, 0.77, numpy.nan),
+            (("CCO",), (1.0,), 298.15, DENSITY, 0.76, numpy.nan),
+            (("CCO",), (1.0,), 298.15, DENSITY, 0.75, numpy.nan),
+            (("CCO",), (1.0,), 298.15, DENSITY, 0.74, 0.001),
+            (("CCCO",), (1.0,), 298.15, DENSITY, 0.73, 0.01),
+            (("CCCO",), (1.0,), 298.15, DENSITY, 0.72, 0.01),
+        ]
+    )
+
+    _assert_same_duplicates(data_frame)
+
+
+def test_rounded_states():
+
+    data_frame = _data_frame(
+        [
+            (("CO",), (1.0,), 298.151, DENSITY, 0.79, 0.001),
+            (("CO",), (1.0,), 298.149, DENSITY, 0.78, 0.01),
+            # Only distinct from the above states before rounding.
+            (("CO",), (1.0,), 298.16, DENSITY, 0.77, 0.01),
+            (("CO", "CCO"), (0.25, 0.75), 298.15, DENSITY, 0.80, 0.01),
+            (("CO", "CCO"), (0.2500001, 0.7499999), 298.15, DENSITY, 0.81, 0.001),
+            (("CO", "CCO"), (0.250001, 0.749999), 298.15, DENSITY, 0.82, 0.001),
+        ],
+        pressure=[101.3251, 101.3249, 101.325, 101.325, 101.325, 101.325],
+    )
+
+    _assert_same_duplicates(data_frame)
+
+
+def test_swapped_component_order():
+
+    data_frame = _data_frame(
+        [
+            (("CO", "CCO"), (0.25, 0.75), 298.15, ENTHALPY_OF_MIXING, 1.0, 0.1),
+            (("CCO", "CO"), (0.75, 0.25), 298.15, ENTHALPY_OF_MIXING, 1.1, 0.01),
+            (("CCO", "CO"), (0.75, 0.25), 298.15, ENTHALPY_OF_MIXING, 1.2, numpy.nan),
+            # The same components at a different composition.
+            (("CCO", "CO"), (0.25, 0.75), 298.15, ENTHALPY_OF_MIXING, 1.3, 0.1),
+            (("CO", "CCO"), (0.25, 0.75), 298.15, DENSITY, 0.80, 0.01),
+            (("CCO", "CO"), (0.75, 0.25), 298.15, DENSITY, 0.81, 0.001),
+        ]
+    )
+
+    _assert_same_duplicates(data_frame)
@@ -0,0 +1,74 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("openeye.oegraphsim")
+pytest.importorskip("openff.evaluator")
+
+from curation_components import SelectDiverseSubstances  # noqa: E402
+from fingerprints import FingerprintTable  # noqa: E402
+from openff.evaluator.datasets.curation.components.selection import (  # noqa: E402
+    SelectSubstances,
+)
+
+SMILES = ["C", "CC", "CO", "CCO", "CCCO", "OCCO", "CC(C)=O", "CCOCC"]
+
+
+@pytest.fixture()
+def similarity(tmp_path, monkeypatch):
+
+    # Keep the molecule cache used to compute the fingerprints out of the repo.
+    monkeypatch.chdir(tmp_path)
+
+    smiles, similarity = FingerprintTable(
+        str(tmp_path / "fingerprints.npz")
+    ).similarity_matrix(SMILES)
+
+    SelectDiverseSubstances._similarity = (
+        {pattern: index for index, pattern in enumerate(smiles)},
+        similarity,
+    )
+
+    yield
+
+    SelectDiverseSubstances._similarity = None
+
+
+def test_pure_distances(similarity):
+
+    for mixture_a, mixture_b in itertools.product(
+        [(smiles,) for smiles in SMILES], repeat=2
+    ):
+
+        assert SelectDiverseSubstances._compute_distance(
+            mixture_a, mixture_b
+        ) == SelectSubstances._compute_distance(mixture_a, mixture_b)
+
+
+@pytest.mark.parametrize(
+    "mixture_a, mixture_b",
+    [
+        (("CO", "CCO"), ("CO", "CCO")),
+        (("CO", "CCO"), ("CCO", "CO")),
+        (("CO", "CCCO"), ("CC", "OCCO")),
+        (("C", "CCOCC"), ("CC(C)=O", "CCO")),
+        # Both ways of pairing up the components have the same total distance, and
+        # so only differ in the order that the distances are summed in.
+        (("CO", "CCCO"), ("CCO", "CCO")),
+        (("C", "CC"), ("CCOCC", "CCOCC")),
+        (("OCCO", "OCCO"), ("CC(C)=O", "CC(C)=O")),
+    ],
+)
+def test_binary_distances(similarity, mixture_a, mixture_b):
+
+    for mixture_a, mixture_b in [(mixture_a, mixture_b), (mixture_b, mixture_a)]:
+
+        assert SelectDiverseSubstances._compute_distance(
+            mixture_a, mixture_b
+        ) == SelectSubstances._compute_distance(mixture_a, mixture_b)
+
+
+def test_mixed_distance(similarity):
+
+    with pytest.raises(ValueError, match="pure substances or two binary"):
+        SelectDiverseSubstances._compute_distance(("CO",), ("CO", "CCO"))
@@ -0,0 +1,198 @@
+from typing import List, Optional, Tuple
+
+import numpy
+import pandas
+import pytest
+
+pytest.importorskip("openff.evaluator")
+
+from openff.evaluator.datasets.curation.components.selection import (  # noqa: E402
+    SelectDataPoints,
+    SelectDataPointsSchema,
+    State,
+    TargetState,
+)
+from state_selection import select_data_points  # noqa: E402
+
+DENSITY = ("Density", "Density Value (g / ml)")
+ENTHALPY_OF_MIXING = ("EnthalpyOfMixing", "EnthalpyOfMixing Value (kJ / mol)")
+
+
+def _data_frame(
+    rows: List[
+        Tuple[Tuple[str, ...], Tuple[float, ...], float, Tuple[str, str], float]
+    ],
+    pressure: Optional[List[float]] = None,
+) -> pandas.DataFrame:
+    """Builds a curation frame from (components, mole fractions, temperature,
+    property, value) tuples."""
+
+    data_rows = []
+
+    for index, row in enumerate(rows):
+
+        components, mole_fractions, temperature, (_, column), value = row
+
+        data_row = {
+            "Id": str(index),
+            "Temperature (K)": temperature,
+            "Pressure (kPa)": 101.325 if pressure is None else pressure[index],
+            "Phase": "Liquid",
+            "N Components": len(components),
+            "Source": f"source-{index}",
+            column: value,
+        }
+
+        for component_index, (smiles, mole_fraction) in enumerate(
+            zip(components, mole_fractions)
+        ):
+
+            data_row[f"Component {component_index + 1}"] = smiles
+            data_row[f"Role {component_index + 1}"] = "Solvent"
+            data_row[f"Mole Fraction {component_index + 1}"] = mole_fraction
+            data_row[f"Exact Amount {component_index + 1}"] = numpy.nan
+
+        data_rows.append(data_row)
+
+    data_frame = pandas.DataFrame(data_rows)
+
+    for _, column in [DENSITY, ENTHALPY_OF_MIXING]:
+
+        if column not in data_frame:
+            data_frame[column] = numpy.nan
+
+    return data_frame
+
+
+def _binary_target_state(*property_types: str) -> TargetState:
+
+    return TargetState(
+        property_types=[(property_type, 2) for property_type in property_types],
+        states=[
+            State(temperature=298.15, pressure=101.325, mole_fractions=(x, 1.0 - x))
+            for x in (0.25, 0.5, 0.75)
+        ],
+    )
+
+
+def _assert_same_selection(
+    data_frame: pandas.DataFrame, target_states: List[TargetState]
+):
+
+    selected_data = select_data_points(data_frame, target_states)
+    expected_data = SelectDataPoints.apply(
+        data_frame, SelectDataPointsSchema(target_states=target_states)
+    )
+
+    assert len(expected_data) > 0
+    assert sorted(selected_data["Id"]) == sorted(expected_data["Id"])
+
+
+def test_swapped_component_order():
+
+    data_frame = _data_frame(
+        [
+            (("CCO", "CO"), (0.2, 0.8), 298.15, DENSITY, 0.80),
+            (("CO", "CCO"), (0.8, 0.2), 298.15, DENSITY, 0.81),
+            (("CO", "CCO"), (0.3, 0.7), 298.15, DENSITY, 0.82),
+            (("CCO", "CO"), (0.5, 0.5), 298.15, DENSITY, 0.83),
+            (("CO", "CCO"), (0.45, 0.55), 298.15, DENSITY, 0.84),
+            (("CCO", "CO"), (0.7, 0.3), 298.15, ENTHALPY_OF_MIXING, 1.0),
+            (("CO", "CCO"), (0.3, 0.7), 298.15, ENTHALPY_OF_MIXING, 1.1),
+        ]
+    )
+
+    _assert_same_selection(
+        data_frame, [_binary_target_state("Density", "EnthalpyOfMixing")]
+    )
+
+
+def test_close_neighbours():
+
+    data_frame = _data_frame(
+        [
+            (("CO",), (1.0,), 298.15, DENSITY, 0.79),
+            # Close to the first state according to ``numpy.isclose``.
+            (("CO",), (1.0,), 298.15 + 1.0e-9, DENSITY, 0.78),
+            (("CO",), (1.0,), 298.15 + 1.0e-6, DENSITY, 0.77),
+            (("CO",), (1.0,), 299.15, DENSITY, 0.76),
+        ],
+        pressure=[101.325, 101.325, 101.325 + 1.0e-9, 101.325],
+    )
+
+    _assert_same_selection(
+        data_frame,
+        [
+            TargetState(
+                property_types=[("Density", 1)],
+                states=[
+                    State(temperature=298.15, pressure=101.325, mole_fractions=(1.0,))
+                ],
+            )
+        ],
+    )
+
+
+def test_multiple_property_clusters():
+
+    data_frame = _data_frame(
+        [
+            (("CCO", "CCCC"), (0.25, 0.75), 298.15, DENSITY, 0.70),
+            (("CCO", "CCCC"), (0.25, 0.75), 298.15, ENTHALPY_OF_MIXING, 1.0),
+            (("CCO", "CCCC"), (0.5, 0.5), 298.15, DENSITY, 0.71),
+            (("CCO", "CCCC"), (0.52, 0.48), 298.15, ENTHALPY_OF_MIXING, 1.1),
+            (("CCO", "CCCC"), (0.5, 0.5), 308.15, ENTHALPY_OF_MIXING, 1.2),
+            (("CCO", "CCCC"), (0.8, 0.2), 303.15, DENSITY, 0.72),
+            (("CCO", "CCCC"), (0.8, 0.2), 303.15, ENTHALPY_OF_MIXING, 1.3),
+            (("CCO", "CCCC"), (0.7, 0.3), 298.15, DENSITY, 0.73),
+            (("CO", "CCCC"), (0.5, 0.5), 298.15, DENSITY, 0.74),
+        ]
+    )
+
+    _assert_same_selection(
+        data_frame,
+        [
+            _binary_target_state("Density", "EnthalpyOfMixing"),
+            TargetState(
+                property_types=[("Density", 2)],
+                states=[
+                    State(
+                        temperature=308.15, pressure=101.325, mole_fractions=(0.5, 0.5)
+                    )
+                ],
+            ),
+        ],
+    )
+
+
+def test_equidistant_states():
+
+    data_frame = _data_frame(
+        [
+            (("CO",), (1.0,), 297.15, DENSITY, 0.79),
+            (("CO",), (1.0,), 299.15, DENSITY, 0.78),
+            (("CCO", "CO"), (0.4, 0.6), 298.15, DENSITY, 0.80),
+            (("CCO", "CO"), (0.6, 0.4), 298.15, DENSITY, 0.81),
+            (("CO", "CCO"), (0.4, 0.6), 298.15, DENSITY, 0.82),
+        ]
+    )
+
+    _assert_same_selection(
+        data_frame,
+        [
+            TargetState(
+                property_types=[("Density", 1)],
+                states=[
+                    State(temperature=298.15, pressure=101.325, mole_fractions=(1.0,))
+                ],
+            ),
+            TargetState(
+                property_types=[("Density", 2)],
+                states=[
+                    State(
+                        temperature=298.15, pressure=101.325, mole_fractions=(0.5, 0.5)
+                    )
+                ],
+            ),
+        ],
+    )
@@ -0,0 +1,346 @@
+"""Utilities for importing data from a local mirror of the ThermoML archive, either
+a directory or a tarball of ThermoML XML files, rather than downloading and
+parsing the whole archive each time the data is needed.
+
+The frame parsed from each file is cached by the checksum of the file, and a
+manifest records the checksum of each file in the mirror, so that refreshing the
+mirror only requires the new or changed files to be parsed.
+"""
+import hashlib
+import json
+import logging
+import os
+import tarfile
+import tempfile
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy
+import pandas
+from compact_frames import compact_frame, expand_frame
+from curation_cache import load_frame, save_frame, schema_hash
+from curation_profiler import parallel_map
+
+logger = logging.getLogger(__name__)
+
+MIRROR_CACHE_DIRECTORY = os.path.join("curation-cache", "thermoml")
+
+
+def _is_thermoml_file(name: str) -> bool:
+    return name.lower().endswith(".xml")
+
+
+def scan_mirror(mirror_path: str) -> Dict[str, Tuple[int, int]]:
+    """Lists the ThermoML files in a mirror.
+
+    Parameters
+    ----------
+    mirror_path
+        The path to the mirror directory or tarball.
+
+    Returns
+    -------
+        The size (bytes) and modification time of each file, indexed by its path
+        relative to the root of the mirror.
+    """
+
+    if os.path.isfile(mirror_path):
+
+        with tarfile.open(mirror_path) as archive:
+
+            return {
+                member.name: (member.size, int(member.mtime))
+                for member in archive.getmembers()
+                if member.isfile() and _is_thermoml_file(member.name)
+            }
+
+    files = {}
+
+    for directory, _, file_names in os.walk(mirror_path):
+
+        for file_name in file_names:
+
+            if not _is_thermoml_file(file_name):
+                continue
+
+            file_path = os.path.join(directory, file_name)
+            file_stat = os.stat(file_path)
+
+            files[os.path.relpath(file_path, mirror_path)] = (
+                file_stat.st_size,
+                file_stat.st_mtime_ns,
+            )
+
+    return files
+
+
+def mirror_hash(mirror_path: str) -> str:
+    """Returns a hash of the listing of a mirror, which changes whenever a file is
+    added to, removed from or modified in the mirror."""
+    return schema_hash(json.dumps(scan_mirror(mirror_path), sort_keys=True))
+
+
+def _parsed_frame_path(cache_directory: str, frame_hash: str) -> str:
+    return os.path.join(cache_directory, f"{frame_hash}.feather")
+
+
+def _parse_file(arguments: Tuple[str, str, str]) -> int:
+    """Parses a single ThermoML file and caches the resulting frame.
+
+    Returns
+    -------
+        The number of data rows parsed from the file.
+    """
+
+    from openff.evaluator.datasets.curation.components.thermoml import (
+        ImportThermoMLData,
+    )
+
+    file_path, frame_path, frame_hash = arguments
+
+    # Parse the file in exactly the same way as the built-in component does when
+    # processing each file of the downloaded archive.
+    data_frame = ImportThermoMLData._process_archive(file_path)
+    save_frame(data_frame, frame_path, frame_hash)
+
+    return len(data_frame)
+
+
+class ThermoMLMirror:
+    """A local mirror of the ThermoML archive."""
+
+    def __init__(self, mirror_path: str, cache_directory: str = MIRROR_CACHE_DIRECTORY):
+        """
+        Parameters
+        ----------
+        mirror_path
+            The path to the mirror directory or tarball.
+        cache_directory
+            The directory to cache the manifest and parsed frames in.
+        """
+
+        self.mirror_path = mirror_path
+        self.cache_directory = cache_directory
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.cache_directory, "manifest.json")
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+
+        if not os.path.isfile(self._manifest_path):
+            return {}
+
+        with open(self._manifest_path) as file:
+            manifest = json.load(file)
+
+        return manifest if manifest.get("mirror") == self.mirror_path else {}
+
+    def _save_manifest(self, files: Dict[str, Dict]):
+
+        temporary_path = f"{self._manifest_path}.{os.getpid()}.tmp"
+
+        with open(temporary_path, "w") as file:
+            json.dump({"mirror": self.mirror_path, "files": files}, file, indent=2)
+
+        os.replace(temporary_path, self._manifest_path)
+
+    @staticmethod
+    def _frame_hash(checksum: str) -> str:
+        """Returns the hash which a frame parsed from a file with a given checksum
+        is cached with, which is invalidated when the parser changes."""
+
+        from openff.evaluator import __version__ as evaluator_version
+
+        return schema_hash(checksum, evaluator_version)
+
+    def _is_up_to_date(self, entry: Optional[Dict], size: int, modified: int) -> bool:
+        """Returns whether a manifest entry matches the current state of a file, and
+        the frame parsed from it is cached."""
+
+        if entry is None or (entry["size"], entry["modified"]) != (size, modified):
+            return False
+
+        frame_hash = self._frame_hash(entry["sha256"])
+        return os.path.isfile(_parsed_frame_path(self.cache_directory, frame_hash))
+
+    def _refresh(self, n_processes: int) -> Dict[str, Dict]:
+        """Parses any files in the mirror which are new or have changed since the
+        manifest was last updated, and returns the updated manifest."""
+
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+        previous_files = self._load_manifest().get("files", {})
+        current_files = scan_mirror(self.mirror_path)
+
+        files, to_parse = {}, []
+
+        with tempfile.TemporaryDirectory() as extract_directory:
+
+            archive = (
+                tarfile.open(self.mirror_path)
+                if os.path.isfile(self.mirror_path)
+                else None
+            )
+
+            try:
+
+                for name, (size, modified) in sorted(current_files.items()):
+
+                    entry = previous_files.get(name)
+
+                    if self._is_up_to_date(entry, size, modified):
+                        files[name] = entry
+                        continue
+
+                    # Only read the contents of files which may have changed.
+                    if archive is None:
+
+                        file_path = os.path.join(self.mirror_path, name)
+
+                        with open(file_path, "rb") as file:
+                            contents = file.read()
+
+                    else:
+
+                        contents = archive.extractfile(name).read()
+
+                        file_path = os.path.join(extract_directory, f"{len(files)}.xml")
+
+                        with open(file_path, "wb") as file:
+                            file.write(contents)
+
+                    checksum = hashlib.sha256(contents).hexdigest()
+
+                    files[name] = {
+                        "size": size,
+                        "modified": modified,
+                        "sha256": checksum,
+                    }
+
+                    frame_hash = self._frame_hash(checksum)
+                    frame_path = _parsed_frame_path(self.cache_directory, frame_hash)
+
+                    # Files which were renamed or touched need not be parsed again.
+                    if not os.path.isfile(frame_path):
+                        to_parse.append((file_path, frame_path, frame_hash))
+
+            finally:
+
+                if archive is not None:
+                    archive.close()
+
+            logger.info(
+                f"{len(to_parse)} of {len(current_files)} ThermoML files need to be "
+                f"parsed."
+            )
+
+            # Stream the files through the parser, with each parsed frame written
+            # straight to the cache rather than returned to this process.
+            for _ in parallel_map(_parse_file, to_parse, n_processes, chunk_size=16):
+                pass
+
+        self._save_manifest(files)
+        return files
+
+    def file_frames(self, n_processes: int = 1) -> Iterator[pandas.DataFrame]:
+        """Yields the (non-empty) frames parsed from each of the files in the
+        mirror in turn, parsing any files which are new or have changed. Only one
+        frame is loaded from the cache at a time.
+
+        Parameters
+        ----------
+        n_processes
+            The number of processes to parse files using.
+        """
+
+        files = self._refresh(n_processes)
+
+        for name, entry in sorted(files.items()):
+
+            frame_hash = self._frame_hash(entry["sha256"])
+            data_frame = load_frame(
+                _parsed_frame_path(self.cache_directory, frame_hash), frame_hash
+            )
+
+            if data_frame is None:
+                raise RuntimeError(f"The parsed frame of {name} could not be loaded.")
+
+            if len(data_frame) > 0:
+                yield data_frame
+
+    def validate(self):
+        """Checks that the frame loaded from the cache for the first (non-empty)
+        file in the mirror is identical to the frame which the built-in
+        ``ImportThermoMLData`` component parses from that file, raising a
+        ``RuntimeError`` if not.
+        """
+
+        from openff.evaluator.datasets.curation.components.thermoml import (
+            ImportThermoMLData,
+        )
+
+        files = self._refresh(1)
+
+        for name, entry in sorted(files.items()):
+
+            frame_hash = self._frame_hash(entry["sha256"])
+            data_frame = load_frame(
+                _parsed_frame_path(self.cache_directory, frame_hash), frame_hash
+            )
+
+            if data_frame is not None and len(data_frame) > 0:
+                break
+
+        else:
+            return
+
+        with tempfile.TemporaryDirectory() as extract_directory:
+
+            if os.path.isfile(self.mirror_path):
+
+                file_path = os.path.join(extract_directory, "file.xml")
+
+                with tarfile.open(self.mirror_path) as archive:
+                    contents = archive.extractfile(name).read()
+
+                with open(file_path, "wb") as file:
+                    file.write(contents)
+
+            else:
+                file_path = os.path.join(self.mirror_path, name)
+
+            expected_data_frame = ImportThermoMLData._process_archive(file_path)
+
+        # The cached frame is stored compactly, and so both frames are expanded
+        # to the same column types before being compared. Missing values are
+        # normalized to NaN after every curation component.
+        try:
+            pandas.testing.assert_frame_equal(
+                expand_frame(compact_frame(data_frame)).fillna(value=numpy.nan),
+                expand_frame(compact_frame(expected_data_frame)).fillna(
+                    value=numpy.nan
+                ),
+            )
+        except AssertionError as error:
+
+            raise RuntimeError(
+                f"The frame imported for {name} from the mirror does not match the "
+                f"one imported by the built-in `ImportThermoMLData` component."
+            ) from error
+
+    def to_pandas(self, n_processes: int = 1) -> pandas.DataFrame:
+        """Returns all of the data in the mirror as a single frame, parsing any
+        files which are new or have changed.
+
+        Parameters
+        ----------
+        n_processes
+            The number of processes to parse files using.
+        """
+
+        data_frames = [*self.file_frames(n_processes)]
+
+        if len(data_frames) == 0:
+            return pandas.DataFrame()
+
+        return pandas.concat(data_frames, ignore_index=True, sort=False)
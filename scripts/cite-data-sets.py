@@ -1,56 +1,217 @@
+import json
 import os
-from glob import glob
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Tuple
 
 import requests
-from nonbonded.library.models.datasets import DataSet
-from requests import HTTPError
+from data_set_index import load_data_set_indices
+from requests import RequestException
 from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.util.retry import Retry
 
+DOI_RESOLVER_URL = "https://doi.org"
 
-def split_doi(doi: str) -> List[str]:
-    return doi.split(" + ")
+N_WORKERS = 16
+N_RETRIES = 5
 
+CACHE_PATH = os.path.join(os.path.pardir, "DATA-CITATIONS-CACHE.json")
 
-def main():
 
-    unique_data_dois = set()
+def normalize_doi(doi: str) -> str:
+    """Normalizes a DOI so that different spellings of the same DOI map onto the
+    same cache entry. DOIs are case insensitive."""
 
-    for data_set_path in glob(
-        os.path.join(os.path.pardir, "schemas", "data-sets", "*.json")
-    ):
+    doi = doi.strip()
 
-        data_set = DataSet.parse_file(data_set_path)
+    for prefix in ["https://doi.org/", "http://dx.doi.org/", "doi:"]:
 
-        unique_data_dois.update(
-            {doi for entry in data_set.entries for doi in split_doi(entry.doi)}
-        )
+        if doi.lower().startswith(prefix):
+            doi = doi[len(prefix) :]
 
-    session = requests.Session()
-    session.mount('http://', HTTPAdapter(max_retries=5))
+    return doi.lower()
+
+
+def load_cache(cache_path: str = CACHE_PATH) -> Dict[str, Dict[str, Any]]:
+    """Loads the cache of previously resolved DOIs, keyed by normalized DOI.
+
+    Each entry stores the BibTeX text (``None`` if the request failed), the time
+    at which the DOI was fetched, and whether the request failed.
+    """
+
+    if not os.path.isfile(cache_path):
+        return {}
+
+    with open(cache_path) as file:
+        return json.load(file)
+
+
+def save_cache(cache: Dict[str, Dict[str, Any]], cache_path: str = CACHE_PATH):
+    """Atomically saves the cache of resolved DOIs."""
+
+    temporary_path = f"{cache_path}.tmp"
+
+    with open(temporary_path, "w") as file:
+        json.dump(cache, file, indent=2, sort_keys=True)
+
+    os.replace(temporary_path, cache_path)
+
+
+def create_session(
+    n_workers: int = N_WORKERS, n_retries: int = N_RETRIES
+) -> requests.Session:
+    """Creates a session with a connection pool large enough to be shared by
+    ``n_workers`` threads, and which retries failed requests with an exponential
+    backoff.
+    """
+
+    retries = Retry(
+        total=n_retries,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+    )
+    adapter = HTTPAdapter(
+        pool_connections=n_workers, pool_maxsize=n_workers, max_retries=retries
+    )
 
-    citations = []
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+def resolve_doi(
+    session: requests.Session, doi: str, resolver_url: str = DOI_RESOLVER_URL
+) -> str:
+    """Retrieves the BibTeX citation of a single DOI."""
+
+    response = session.get(
+        f"{resolver_url}/{doi}",
+        headers={"Accept": "text/bibliography; style=bibtex"},
+        timeout=30,
+    )
+    response.raise_for_status()
+
+    return response.text
+
+
+def resolve_dois(
+    dois: Iterable[str],
+    resolver_url: str = DOI_RESOLVER_URL,
+    n_workers: int = N_WORKERS,
+) -> Tuple[Dict[str, str], List[str]]:
+    """Concurrently resolves a set of DOIs into BibTeX citations using a bounded
+    pool of worker threads which share a single pooled session.
+
+    Parameters
+    ----------
+    dois
+        The DOIs to resolve.
+    resolver_url
+        The base URL of the DOI resolver. This may be pointed at a local server
+        when testing.
+    n_workers
+        The maximum number of requests to have in flight at once.
+
+    Returns
+    -------
+        A dictionary of the resolved citations keyed by their DOI, and the list
+        of DOIs which could not be resolved.
+    """
+
+    dois = sorted({*dois})
+
+    citations = {}
     failed_requests = []
 
-    for doi in tqdm(unique_data_dois):
+    with create_session(n_workers) as session:
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+
+            futures = {
+                executor.submit(resolve_doi, session, doi, resolver_url): doi
+                for doi in dois
+            }
+
+            for future in tqdm(as_completed(futures), total=len(futures)):
+
+                doi = futures[future]
+
+                try:
+                    citations[doi] = future.result()
+                except RequestException:
+                    failed_requests.append(doi)
+
+    return citations, sorted(failed_requests)
+
+
+def update_cache(
+    cache: Dict[str, Dict[str, Any]],
+    dois: Iterable[str],
+    resolver_url: str = DOI_RESOLVER_URL,
+    n_workers: int = N_WORKERS,
+) -> List[str]:
+    """Resolves any normalized DOIs which are either missing from the cache or
+    whose previous request failed, and stores the outcome in the cache.
 
-        # Fix malformed DOIs
-        doi_corrections = {"0021-9614(79)90127-7": "10.1016/0021-9614(79)90127-7"}
-        doi = doi_corrections.get(doi, doi)
+    Returns
+    -------
+        The DOIs which were sent to the resolver.
+    """
 
-        response = requests.get(
-            f"http://dx.doi.org/{doi}",
-            headers={'Accept': 'text/bibliography; style=bibtex'},
-        )
+    dois_to_fetch = sorted(
+        {doi for doi in dois if doi not in cache or cache[doi]["failed"]}
+    )
 
-        try:
-            response.raise_for_status()
-        except HTTPError:
-            failed_requests.append(doi)
-            continue
+    if len(dois_to_fetch) == 0:
+        return dois_to_fetch
+
+    citations, failed_requests = resolve_dois(dois_to_fetch, resolver_url, n_workers)
+    fetched_at = datetime.now(timezone.utc).isoformat()
+
+    for doi in dois_to_fetch:
+
+        cache[doi] = {
+            "bibtex": citations.get(doi),
+            "fetched_at": fetched_at,
+            "failed": doi in failed_requests,
+        }
+
+    return dois_to_fetch
+
+
+def main():
 
-        citations.append(response.text)
+    # The DOIs are read from the index of each data set rather than by parsing the
+    # data sets themselves.
+    data_set_indices = load_data_set_indices(
+        os.path.join(os.path.pardir, "schemas", "data-sets")
+    )
+
+    unique_data_dois = {
+        doi
+        for data_set_index in data_set_indices.values()
+        for doi in data_set_index.dois()
+    }
+
+    # Fix malformed DOIs
+    doi_corrections = {"0021-9614(79)90127-7": "10.1016/0021-9614(79)90127-7"}
+    unique_data_dois = {
+        normalize_doi(doi_corrections.get(doi, doi)) for doi in unique_data_dois
+    }
+
+    # Only send new DOIs, or those which previously failed, to the resolver.
+    cache = load_cache()
+    update_cache(cache, unique_data_dois)
+    save_cache(cache)
+
+    citations = [
+        cache[doi]["bibtex"]
+        for doi in sorted(unique_data_dois)
+        if not cache[doi]["failed"]
+    ]
+    failed_requests = [doi for doi in sorted(unique_data_dois) if cache[doi]["failed"]]
 
     with open(os.path.join(os.path.pardir, "DATA-CITATIONS.bib"), "w") as file:
         file.write("\n".join(citations))
@@ -59,5 +220,5 @@ def main():
         file.write("\n".join(failed_requests))
 
 
-if __name__ == '__main__':
+if __name__ == "__main__":
     main()
@@ -0,0 +1,441 @@
+"""A lazy, indexed loader for the data sets stored in ``schemas/data-sets``.
+
+Each data set file is scanned once to record the byte offsets of each of its
+entries, alongside which entries were measured for each property type, substance
+and DOI. The file is streamed through the scanner in fixed size chunks, and only
+the fields which are indexed are decoded from each entry. The index is persisted
+so that later queries (such as listing the substances in, or counting the entries
+of, a data set) never require the file to be parsed, and individual entries are
+only read, decoded and turned into ``DataSetEntry`` models when they are accessed.
+"""
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from nonbonded.library.models.datasets import DataSetEntry
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+INDEX_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.path.pardir, ".data-set-index"
+)
+
+# Bump this whenever the format of the index changes to invalidate existing ones.
+INDEX_VERSION = 2
+
+CHUNK_SIZE = 1 << 20
+
+# Matches either a complete JSON string, a bracket, or the opening quote of a
+# string which is not terminated within the scanned text. Brackets which appear
+# inside of strings are consumed along with the string and so are never matched.
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]"]')
+
+
+def _field_pattern(field: bytes) -> "re.Pattern[bytes]":
+    """Returns a pattern which matches the string value of a field. Quotes which
+    appear inside of other JSON strings are always escaped and so cannot produce
+    false matches."""
+    return re.compile(b'"' + field + rb'"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+_PROPERTY_TYPE_PATTERN = _field_pattern(b"property_type")
+_DOI_PATTERN = _field_pattern(b"doi")
+_SMILES_PATTERN = _field_pattern(b"smiles")
+
+
+def substance_key(entry: Dict[str, Any]) -> Tuple[str, ...]:
+    """Returns the sorted SMILES patterns of the components of an entry."""
+    return tuple(sorted(component["smiles"] for component in entry["components"]))
+
+
+def split_doi(doi: str) -> List[str]:
+    return doi.split(" + ")
+
+
+def _entry_fields(entry: bytes) -> Dict[str, Any]:
+    """Decodes only the fields of a serialized entry which are indexed."""
+
+    return {
+        "property_type": json.loads(_PROPERTY_TYPE_PATTERN.search(entry).group(1)),
+        "doi": json.loads(_DOI_PATTERN.search(entry).group(1)),
+        "components": [
+            {"smiles": json.loads(match.group(1))}
+            for match in _SMILES_PATTERN.finditer(entry)
+        ],
+    }
+
+
+def _scan_data_set(
+    file: BinaryIO, chunk_size: int = CHUNK_SIZE
+) -> Tuple[Dict[str, Any], List[Tuple[int, int]], List[Dict[str, Any]]]:
+    """Scans a serialized data set in fixed size chunks, such that the memory
+    required does not depend on the size of the data set.
+
+    Returns
+    -------
+        The fields of the data set other than its entries, the start and end
+        byte offsets of each entry, and the indexed fields of each entry.
+    """
+
+    header_parts, entry_parts = [], []
+    offsets, entries = [], []
+
+    # Whether the scanner is in the header (i.e. outside of the entries array),
+    # between two entries, or inside of an entry.
+    state, depth = "header", 0
+    last_string, entry_start = None, None
+
+    buffer, buffer_offset = b"", 0
+
+    for chunk in iter(lambda: file.read(chunk_size), b""):
+
+        buffer += chunk
+        segment_start, tail_start = 0, len(buffer)
+
+        for match in _TOKEN.finditer(buffer):
+
+            token = match.group()
+
+            if token == b'"':
+
+                # Carry the unterminated string over to the next chunk.
+                tail_start = match.start()
+                break
+
+            if token[0] == ord('"'):
+
+                if depth == 1:
+                    last_string = token
+
+                continue
+
+            if token in b"[{":
+
+                if state == "header" and depth == 1 and last_string == b'"entries"':
+
+                    header_parts.append(buffer[segment_start : match.end()])
+                    state = "between"
+
+                elif state == "between" and depth == 2:
+
+                    segment_start = match.start()
+                    entry_start = buffer_offset + match.start()
+                    state = "entry"
+
+                depth += 1
+                continue
+
+            depth -= 1
+
+            if state == "entry" and depth == 2:
+
+                entry_parts.append(buffer[segment_start : match.end()])
+                entry = b"".join(entry_parts)
+
+                offsets.append((entry_start, buffer_offset + match.end()))
+                entries.append(_entry_fields(entry))
+
+                entry_parts = []
+                state = "between"
+
+            elif state == "between" and depth == 1:
+
+                segment_start = match.start()
+                state = "header"
+
+        if state == "header":
+            header_parts.append(buffer[segment_start:tail_start])
+        elif state == "entry":
+            entry_parts.append(buffer[segment_start:tail_start])
+
+        buffer, buffer_offset = buffer[tail_start:], buffer_offset + tail_start
+
+    if len(buffer.strip()) > 0 or depth != 0:
+        raise ValueError(f"The data set ended unexpectedly at offset {buffer_offset}.")
+
+    header = json.loads(b"".join(header_parts))
+    header.pop("entries", None)
+
+    return header, offsets, entries
+
+
+class DataSetIndex:
+    """A lazily loaded data set, whose entries are indexed by property type,
+    substance and DOI."""
+
+    def __init__(self, path: str, index_directory: str = INDEX_DIRECTORY):
+        """
+        Parameters
+        ----------
+        path
+            The path to the serialized data set.
+        index_directory
+            The directory to persist the index of the data set in.
+        """
+
+        self.path = path
+
+        path_hash = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+        self._index_path = os.path.join(
+            index_directory, f"{os.path.basename(path)}-{path_hash}.json"
+        )
+
+        self._index: Optional[Dict[str, Any]] = None
+
+    def _source_state(self) -> List[int]:
+
+        file_stat = os.stat(self.path)
+        return [INDEX_VERSION, file_stat.st_size, file_stat.st_mtime_ns]
+
+    def _build_index(self) -> Dict[str, Any]:
+
+        with open(self.path, "rb") as file:
+            header, offsets, entries = _scan_data_set(file)
+
+        property_types, substances, dois = (
+            defaultdict(list),
+            defaultdict(list),
+            defaultdict(list),
+        )
+
+        for index, entry in enumerate(entries):
+
+            property_types[entry["property_type"]].append(index)
+            substances[" ".join(substance_key(entry))].append(index)
+
+            for doi in split_doi(entry["doi"]):
+                dois[doi].append(index)
+
+        return {
+            "source": self._source_state(),
+            "header": header,
+            "offsets": offsets,
+            "property_types": property_types,
+            "substances": substances,
+            "dois": dois,
+        }
+
+    def _read_index(self) -> Optional[Dict[str, Any]]:
+        """Reads the persisted index, returning ``None`` if it does not exist or
+        is out of date."""
+
+        if not os.path.isfile(self._index_path):
+            return None
+
+        with open(self._index_path, "rb") as file:
+            index = _loads(file.read())
+
+        return index if index["source"] == self._source_state() else None
+
+    def is_indexed(self) -> bool:
+        """Returns whether an up to date index of the data set has been persisted,
+        loading it if so."""
+
+        if self._index is None:
+            self._index = self._read_index()
+
+        return self._index is not None
+
+    def _load_index(self) -> Dict[str, Any]:
+
+        if self._index is not None:
+            return self._index
+
+        index = self._read_index()
+
+        if index is None:
+
+            index = self._build_index()
+
+            os.makedirs(os.path.dirname(self._index_path), exist_ok=True)
+            temporary_path = f"{self._index_path}.{os.getpid()}.tmp"
+
+            with open(temporary_path, "w") as file:
+                json.dump(index, file)
+
+            os.replace(temporary_path, self._index_path)
+
+        self._index = index
+        return index
+
+    @property
+    def id(self) -> str:
+        """The unique id of the data set."""
+        return self._load_index()["header"]["id"]
+
+    @property
+    def header(self) -> Dict[str, Any]:
+        """The fields of the data set other than its entries."""
+        return self._load_index()["header"]
+
+    def __len__(self) -> int:
+        return len(self._load_index()["offsets"])
+
+    def property_types(self) -> Dict[str, int]:
+        """Returns the number of entries measured for each property type."""
+
+        return {
+            property_type: len(indices)
+            for property_type, indices in self._load_index()["property_types"].items()
+        }
+
+    def substances(self) -> Dict[Tuple[str, ...], int]:
+        """Returns the number of entries measured for each substance, keyed by the
+        sorted SMILES patterns of its components."""
+
+        return {
+            tuple(substance.split(" ")): len(indices)
+            for substance, indices in self._load_index()["substances"].items()
+        }
+
+    def dois(self) -> Set[str]:
+        """Returns the DOIs of the sources of any of the entries."""
+        return {*self._load_index()["dois"]}
+
+    def entry_indices(
+        self,
+        property_type: Optional[str] = None,
+        substance: Optional[Tuple[str, ...]] = None,
+        doi: Optional[str] = None,
+    ) -> List[int]:
+        """Returns the indices of the entries which match all of the (optional)
+        filters.
+
+        Parameters
+        ----------
+        property_type
+            The property type that the entries must have been measured for.
+        substance
+            The SMILES patterns of the components of the substance that the
+            entries must have been measured for, in any order.
+        doi
+            The DOI of a source that the entries must have been drawn from.
+        """
+
+        index = self._load_index()
+        selected: Optional[Set[int]] = None
+
+        for postings, key in [
+            (index["property_types"], property_type),
+            (
+                index["substances"],
+                None if substance is None else " ".join(sorted(substance)),
+            ),
+            (index["dois"], doi),
+        ]:
+
+            if key is None:
+                continue
+
+            matches = {*postings.get(key, [])}
+            selected = matches if selected is None else selected & matches
+
+        return (
+            [*range(len(index["offsets"]))] if selected is None else sorted(selected)
+        )
+
+    def _read_entry(self, file: BinaryIO, index: int) -> Dict[str, Any]:
+
+        start, end = self._load_index()["offsets"][index]
+
+        file.seek(start)
+        return _loads(file.read(end - start))
+
+    def raw_entry(self, index: int) -> Dict[str, Any]:
+        """Reads and decodes a single entry into a dictionary."""
+
+        with open(self.path, "rb") as file:
+            return self._read_entry(file, index)
+
+    def raw_entries(self, **filters) -> Iterator[Dict[str, Any]]:
+        """Reads and decodes the entries which match a set of filters (see
+        ``entry_indices``) into dictionaries."""
+
+        indices = self.entry_indices(**filters)
+
+        with open(self.path, "rb") as file:
+
+            for index in indices:
+                yield self._read_entry(file, index)
+
+    def entries(self, **filters) -> Iterator["DataSetEntry"]:
+        """Builds the entries which match a set of filters (see
+        ``entry_indices``)."""
+
+        from nonbonded.library.models.datasets import DataSetEntry
+
+        for raw_entry in self.raw_entries(**filters):
+            yield DataSetEntry(**raw_entry)
+
+
+def _build_data_set_index(data_set_index: DataSetIndex):
+    """Builds and persists the index of a data set."""
+    data_set_index._load_index()
+
+
+def load_data_set_indices(
+    directory: str,
+    index_directory: str = INDEX_DIRECTORY,
+    n_processes: Optional[int] = None,
+) -> Dict[str, DataSetIndex]:
+    """Indexes each of the data sets stored in a directory. The data sets whose
+    persisted index is missing or out of date are scanned concurrently.
+
+    Parameters
+    ----------
+    directory
+        The directory containing the serialized data sets.
+    index_directory
+        The directory to persist the index of each data set in.
+    n_processes
+        The number of processes to scan the data sets using. By default one
+        process per CPU is used.
+
+    Returns
+    -------
+        The index of each data set, keyed by the name of its file without the
+        extension.
+    """
+
+    data_set_indices = {
+        os.path.splitext(os.path.basename(path))[0]: DataSetIndex(
+            path, index_directory
+        )
+        for path in sorted(glob(os.path.join(directory, "*.json")))
+    }
+
+    stale_indices = [
+        data_set_index
+        for data_set_index in data_set_indices.values()
+        if not data_set_index.is_indexed()
+    ]
+
+    if len(stale_indices) > 1 and n_processes != 1:
+
+        # Each index is persisted by the worker which builds it, and so is only
+        # loaded by this process when it is first accessed.
+        with ProcessPoolExecutor(max_workers=n_processes) as executor:
+            [*executor.map(_build_data_set_index, stale_indices)]
+
+    return data_set_indices
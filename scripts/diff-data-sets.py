@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from data_set_index import load_data_set_indices
+
+# The data sets used in the publication.
+CANONICAL_DIRECTORY = os.path.join(os.path.pardir, "schemas", "data-sets")
+# The data sets produced by re-running the curation script.
+REGENERATED_DIRECTORY = os.path.join(os.path.pardir, "data-set-curation", "data-sets")
+
+REPORT_PATH = "DATA-SET-DIFF.json"
+
+# The precision with which state variables are compared.
+TEMPERATURE_DECIMALS = 2
+PRESSURE_DECIMALS = 3
+MOLE_FRACTION_DECIMALS = 4
+
+
+def entry_key(entry: Dict[str, Any]) -> str:
+    """Returns a hash of the property type, components and state of an entry, which
+    identifies the measurement independently of the order of its components and
+    of its (arbitrary) id."""
+
+    components = sorted(
+        (
+            component["smiles"],
+            round(component["mole_fraction"], MOLE_FRACTION_DECIMALS),
+            component["exact_amount"],
+            component["role"],
+        )
+        for component in entry["components"]
+    )
+
+    key = (
+        entry["property_type"],
+        entry["phase"],
+        components,
+        round(entry["temperature"], TEMPERATURE_DECIMALS),
+        round(entry["pressure"], PRESSURE_DECIMALS),
+    )
+
+    return hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
+
+def entry_content(entry: Dict[str, Any]) -> str:
+    """Returns a hash of the measured value of an entry."""
+
+    content = (
+        entry["value"],
+        entry["std_error"],
+        " + ".join(sorted(entry["doi"].split(" + "))),
+    )
+
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+def index_entries(
+    entries: List[Dict[str, Any]]
+) -> Dict[str, List[Tuple[str, Dict[str, Any]]]]:
+    """Indexes the entries of a data set by their key, storing alongside each the
+    hash of its content."""
+
+    index = defaultdict(list)
+
+    for entry in entries:
+        index[entry_key(entry)].append((entry_content(entry), entry))
+
+    return index
+
+
+def diff_entries(
+    canonical_entries: List[Dict[str, Any]], regenerated_entries: List[Dict[str, Any]]
+) -> Dict[str, List[Any]]:
+    """Finds the entries which were added to, removed from, or changed between the
+    canonical and regenerated versions of a data set.
+
+    Returns
+    -------
+        The added and removed entries, and the pairs of (canonical, regenerated)
+        entries whose values changed.
+    """
+
+    canonical_index = index_entries(canonical_entries)
+    regenerated_index = index_entries(regenerated_entries)
+
+    added, removed, changed = [], [], []
+
+    for key in canonical_index.keys() | regenerated_index.keys():
+
+        canonical = canonical_index.get(key, [])
+        regenerated = regenerated_index.get(key, [])
+
+        # Match up any entries with identical content first.
+        regenerated_by_content = defaultdict(list)
+
+        for content, entry in regenerated:
+            regenerated_by_content[content].append(entry)
+
+        unmatched_canonical = []
+
+        for content, entry in canonical:
+
+            if len(regenerated_by_content[content]) > 0:
+                regenerated_by_content[content].pop()
+            else:
+                unmatched_canonical.append(entry)
+
+        unmatched_regenerated = [
+            entry for entries in regenerated_by_content.values() for entry in entries
+        ]
+
+        n_changed = min(len(unmatched_canonical), len(unmatched_regenerated))
+
+        changed.extend(
+            zip(unmatched_canonical[:n_changed], unmatched_regenerated[:n_changed])
+        )
+        removed.extend(unmatched_canonical[n_changed:])
+        added.extend(unmatched_regenerated[n_changed:])
+
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def main():
+
+    canonical_indices = load_data_set_indices(CANONICAL_DIRECTORY)
+    regenerated_indices = load_data_set_indices(REGENERATED_DIRECTORY)
+
+    report = {}
+
+    for data_set_id in sorted(canonical_indices.keys() | regenerated_indices.keys()):
+
+        canonical_entries = (
+            []
+            if data_set_id not in canonical_indices
+            else [*canonical_indices[data_set_id].raw_entries()]
+        )
+        regenerated_entries = (
+            []
+            if data_set_id not in regenerated_indices
+            else [*regenerated_indices[data_set_id].raw_entries()]
+        )
+
+        report[data_set_id] = diff_entries(canonical_entries, regenerated_entries)
+
+        print(
+            f"{data_set_id}: {len(canonical_entries)} canonical entries, "
+            f"{len(regenerated_entries)} regenerated entries, "
+            f"{len(report[data_set_id]['added'])} added, "
+            f"{len(report[data_set_id]['removed'])} removed, "
+            f"{len(report[data_set_id]['changed'])} changed"
+        )
+
+    with open(REPORT_PATH, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
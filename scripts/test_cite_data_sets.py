@@ -0,0 +1,116 @@
+import importlib.util
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+_spec = importlib.util.spec_from_file_location(
+    "cite_data_sets", os.path.join(os.path.dirname(__file__), "cite-data-sets.py")
+)
+cite_data_sets = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(cite_data_sets)
+
+
+class _ResolverHandler(BaseHTTPRequestHandler):
+    """A stand-in DOI resolver which returns a dummy citation for every DOI
+    other than those in ``missing_dois``, which it returns a 404 for."""
+
+    missing_dois = {"10.1000/missing"}
+    requested_dois = []
+
+    def do_GET(self):
+
+        doi = self.path.lstrip("/")
+        self.requested_dois.append(doi)
+
+        if doi in self.missing_dois:
+
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = f"@article{{{doi}}}".encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def resolver_url():
+
+    _ResolverHandler.requested_dois = []
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ResolverHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.server_port}"
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_resolve_dois(resolver_url):
+
+    citations, failed_requests = cite_data_sets.resolve_dois(
+        ["10.1000/a", "10.1000/b", "10.1000/missing", "10.1000/a"],
+        resolver_url,
+        n_workers=2,
+    )
+
+    assert citations == {
+        "10.1000/a": "@article{10.1000/a}",
+        "10.1000/b": "@article{10.1000/b}",
+    }
+    assert failed_requests == ["10.1000/missing"]
+
+    assert sorted(_ResolverHandler.requested_dois) == [
+        "10.1000/a",
+        "10.1000/b",
+        "10.1000/missing",
+    ]
+
+
+def test_update_cache(resolver_url):
+
+    cache = {
+        "10.1000/cached": {
+            "bibtex": "@article{cached}",
+            "fetched_at": "2020-01-01T00:00:00+00:00",
+            "failed": False,
+        },
+        "10.1000/failed": {
+            "bibtex": None,
+            "fetched_at": "2020-01-01T00:00:00+00:00",
+            "failed": True,
+        },
+    }
+
+    fetched_dois = cite_data_sets.update_cache(
+        cache,
+        ["10.1000/cached", "10.1000/failed", "10.1000/new"],
+        resolver_url,
+        n_workers=2,
+    )
+
+    # Only the DOIs which are new or which previously failed are re-fetched.
+    assert fetched_dois == ["10.1000/failed", "10.1000/new"]
+    assert sorted(_ResolverHandler.requested_dois) == fetched_dois
+
+    assert cache["10.1000/cached"]["bibtex"] == "@article{cached}"
+    assert cache["10.1000/failed"]["bibtex"] == "@article{10.1000/failed}"
+    assert not cache["10.1000/failed"]["failed"]
+    assert cache["10.1000/new"]["bibtex"] == "@article{10.1000/new}"
+
+    # A second update has nothing left to fetch.
+    _ResolverHandler.requested_dois = []
+
+    assert cite_data_sets.update_cache(cache, ["10.1000/new"], resolver_url) == []
+    assert _ResolverHandler.requested_dois == []